@@ -0,0 +1,35 @@
+import dramatiq
+from dramatiq.middleware import Middleware
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+
+class DbConnectionsMiddleware(Middleware):
+    """Closes stale Django database connections around each message, like request_finished does for views."""
+
+    def before_process_message(self, broker, message):
+        close_old_connections()
+
+    def after_process_message(self, broker, message, *, result=None, exception=None):
+        close_old_connections()
+
+    after_skip_message = after_process_message
+
+
+_broker = None
+
+
+def setup_broker():
+    """Builds the broker described by settings.DRAMATIQ_BROKER and installs it as the global broker."""
+    global _broker
+    if _broker is not None:
+        return _broker
+
+    config = settings.DRAMATIQ_BROKER
+    broker_class = import_string(config["BROKER"])
+    middleware = [import_string(path)() for path in config.get("MIDDLEWARE", [])]
+    broker = broker_class(middleware=middleware, **config.get("OPTIONS", {}))
+    dramatiq.set_broker(broker)
+    _broker = broker
+    return broker
@@ -126,20 +126,50 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Like the cache below, the broker is in-memory unless REDIS_URL is set, so tests and local runs
+# need no Redis; workers and any deployment with ASYNC_GRADING must set REDIS_URL
 DRAMATIQ_BROKER = {
-    "BROKER": "dramatiq.brokers.redis.RedisBroker",
-    "OPTIONS": {
-        "url": "redis://localhost:6379/0",
-    },
+    "BROKER": "dramatiq.brokers.stub.StubBroker",
+    "OPTIONS": {},
     "MIDDLEWARE": [
-        "dramatiq.middleware.PrometheusMiddleware",
-        "dramatiq.middleware.AgeLimitMiddleware",
-        "dramatiq.middleware.TimeLimitMiddleware",
-        "dramatiq.middleware.CallbacksMiddleware",
-        "dramatiq.middleware.RetriesMiddleware",
-        "dramatiq.middleware.AdminMiddleware",
+        "dramatiq.middleware.AgeLimit",
+        "dramatiq.middleware.TimeLimit",
+        "dramatiq.middleware.Callbacks",
+        "dramatiq.middleware.Retries",
+        "avag_learning.broker.DbConnectionsMiddleware",
     ]
 }
+if os.environ.get("REDIS_URL"):
+    DRAMATIQ_BROKER = {
+        "BROKER": "dramatiq.brokers.redis.RedisBroker",
+        "OPTIONS": {
+            "url": os.environ["REDIS_URL"],
+        },
+        "MIDDLEWARE": [
+            "dramatiq.middleware.Prometheus",
+            *DRAMATIQ_BROKER["MIDDLEWARE"],
+        ]
+    }
+
+# Game sessions and answer keys live in the cache, so production needs a shared backend
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+
+GAME_SESSION_TIMEOUT = 60 * 60 * 3  # seconds
+
+# Sorted-set mirror of the leaderboard; without it ranks are served from LeaderboardEntry
+LEADERBOARD_REDIS_URL = os.environ.get("REDIS_URL")
+
+# When True, submitted answers are stored ungraded and graded by learning.tasks
+ASYNC_GRADING = os.environ.get("ASYNC_GRADING", "False") == "True"
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,22 @@
+"""
+Dramatiq worker entrypoint for avag_learning project.
+
+Run the workers with:
+    dramatiq avag_learning.workers
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'avag_learning.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.exceptions import ImproperlyConfigured  # noqa: E402
+
+if settings.DRAMATIQ_BROKER["BROKER"].endswith("StubBroker"):
+    # The in-memory broker only reaches actors in its own process
+    raise ImproperlyConfigured("Set REDIS_URL so the workers share a broker with the web processes.")
+
+import learning.tasks  # noqa: E402,F401  (registers the actors)
@@ -0,0 +1,61 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from .exceptions import InvalidActivityCursor
+from .models import ActivityEvent
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+TIMELINE_ORDERING = ("-occurred_at", "-id")
+
+
+def record(student_id, kind, object_id, occurred_at=None):
+    return ActivityEvent.objects.create(
+        student_id=student_id, kind=kind, object_id=object_id, occurred_at=occurred_at or now()
+    )
+
+
+def record_many(student_id, kind, object_ids, occurred_at=None):
+    """Appends one event per object with a single insert, e.g. every answer of a game submission."""
+    occurred_at = occurred_at or now()
+    return ActivityEvent.objects.bulk_create([
+        ActivityEvent(student_id=student_id, kind=kind, object_id=object_id, occurred_at=occurred_at)
+        for object_id in object_ids
+    ])
+
+
+def timeline(student_id, before=None, limit=PAGE_SIZE):
+    """
+    Returns ``(events, next_position)`` for one page of a student's events,
+    newest first. Pages are keyset-paginated on activity_timeline_idx, so each
+    one is a single index range scan whatever its depth.
+    """
+    events = ActivityEvent.objects.filter(student_id=student_id).order_by(*TIMELINE_ORDERING)
+    if before is not None:
+        occurred_at, event_id = before
+        events = events.filter(Q(occurred_at__lt=occurred_at) | Q(occurred_at=occurred_at, id__lt=event_id))
+    events = list(events[:limit + 1])
+    has_more = len(events) > limit
+    events = events[:limit]
+    next_position = (events[-1].occurred_at, events[-1].id) if has_more else None
+    return events, next_position
+
+
+def encode_cursor(position):
+    occurred_at, event_id = position
+    return base64.urlsafe_b64encode(json.dumps([occurred_at.isoformat(), event_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        occurred_at, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        occurred_at = parse_datetime(occurred_at)
+        if occurred_at is None:
+            raise ValueError
+        return occurred_at, int(event_id)
+    except (ValueError, TypeError):
+        raise InvalidActivityCursor()
@@ -4,6 +4,7 @@ from unfold.admin import ModelAdmin
 from .models import (Badge, Certificate, Institution, KnowledgeTrail,
                     Option, Question,PlayedGame,
                     StudentAnswer, Subject, Topic, Achievement)
+from .regrade import regrade_questions
  
 
 
@@ -15,10 +16,22 @@ from .models import (Badge, Certificate, Institution, KnowledgeTrail,
 @admin.register(KnowledgeTrail)
 @admin.register(Subject)
 @admin.register(Topic)
-@admin.register(Question)
 @admin.register(Option)
 @admin.register(StudentAnswer)
 class CustomAdminClass(ModelAdmin):
     compressed_fields = True
     warn_unsaved_form = True
-   
\ No newline at end of file
+
+
+@admin.register(Question)
+class QuestionAdmin(CustomAdminClass):
+    actions = ["regrade_answers"]
+
+    @admin.action(description="Regrade student answers")
+    def regrade_answers(self, request, queryset):
+        report = regrade_questions(queryset.values_list("id", flat=True))
+        self.message_user(
+            request,
+            f"Regraded {report['answers']} answer(s): {report['now_correct']} now correct, "
+            f"{report['now_incorrect']} now incorrect."
+        )
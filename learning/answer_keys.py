@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from learning.choices import QuestionType
+
+AnswerKey = namedtuple(
+    "AnswerKey",
+    ["question_type", "correct_answer", "correct_option_ids", "ordered_option_ids", "correct_count"],
+)
+
+CACHE_PREFIX = "answer-key"
+CACHE_TIMEOUT = getattr(settings, "ANSWER_KEY_CACHE_TIMEOUT", 60 * 60 * 24)
+LOCAL_CACHE_SIZE = getattr(settings, "ANSWER_KEY_LOCAL_CACHE_SIZE", 2048)
+
+
+class LocalAnswerKeyCache:
+    """
+    Process-local LRU tier in front of the Django cache. Entries are keyed by
+    (question id, version) so a bumped version simply misses.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def forget(self, question_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == question_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalAnswerKeyCache(LOCAL_CACHE_SIZE)
+
+
+def question_version(question):
+    # updated_at moves on every Question save and is bumped by the Option signals
+    if question.updated_at is None:
+        return 0
+    return int(question.updated_at.timestamp() * 1_000_000)
+
+
+def _cache_key(question_id, version):
+    return f"{CACHE_PREFIX}:{question_id}:{version}"
+
+
+def normalize_answer(value):
+    return value.strip().lower() if value else None
+
+
+def build_answer_key(question):
+    """Compiles the answer key for a question from its options (one query, or none if prefetched)."""
+    options = list(question.options.all())
+    ordered_options = sorted(options, key=lambda option: (option.order is None, option.order or 0, option.id))
+    correct_option_ids = frozenset(option.id for option in options if option.is_correct)
+    return AnswerKey(
+        question_type=question.question_type,
+        correct_answer=normalize_answer(question.correct_answer),
+        correct_option_ids=correct_option_ids,
+        ordered_option_ids=tuple(option.id for option in ordered_options),
+        correct_count=len(correct_option_ids),
+    )
+
+
+def get_answer_key(question):
+    """Returns the answer key for ``question``, checking the local LRU, then the Django cache."""
+    version = question_version(question)
+    local_key = (question.id, version)
+
+    answer_key = local_cache.get(local_key)
+    if answer_key is not None:
+        return answer_key
+
+    cache_key = _cache_key(question.id, version)
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answer_key = build_answer_key(question)
+        cache.set(cache_key, answer_key, CACHE_TIMEOUT)
+
+    local_cache.set(local_key, answer_key)
+    return answer_key
+
+
+def invalidate_answer_key(question_id, version=None):
+    local_cache.forget(question_id)
+    if version is not None:
+        cache.delete(_cache_key(question_id, version))
+
+
+def grade_answer(answer_key, selected_option_id=None, typed_answer=None):
+    """Grades a single answer against a compiled answer key without touching the database."""
+    if answer_key.question_type == QuestionType.FILL_IN_THE_BLANK:
+        submitted = normalize_answer(typed_answer)
+        return bool(submitted and answer_key.correct_answer) and submitted == answer_key.correct_answer
+
+    if answer_key.question_type == QuestionType.MATCH_THE_COLUMN:
+        if not typed_answer:
+            return False
+        try:
+            submitted_ids = tuple(map(int, typed_answer.strip().split(',')))
+        except ValueError:
+            return False
+        return submitted_ids == answer_key.ordered_option_ids
+
+    if answer_key.question_type == QuestionType.WORD_HUNT:
+        if not typed_answer:
+            return False
+        try:
+            return int(typed_answer.strip()) == answer_key.correct_count
+        except ValueError:
+            return False  # Invalid number submitted by student
+
+    return selected_option_id is not None and selected_option_id in answer_key.correct_option_ids
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import rollups, versions
+from .choices import LeaderboardWindow
+from .leaderboard import PAGE_ORDERING
+from .models import Achievement, Badge, LeaderboardEntry, LeaderboardRollup
+
+# (name, description, image) for positions 1, 2, 3, ...
+RANK_BADGES = [
+    ("Gold", "Awarded to the student with the highest score.", "badges/gold.png"),
+    ("Silver", "Awarded to the student with the second highest score.", "badges/silver.png"),
+    ("Bronze", "Awarded to the student with the third highest score.", "badges/bronze.png"),
+]
+
+
+def reconcile_rank_badges(scope="", scope_id=None, window=LeaderboardWindow.ALL_TIME, badges=RANK_BADGES):
+    """
+    Makes the holders of a board's position badges match its current top-K,
+    where K is ``len(badges)``. The top-K is diffed against the current
+    holders and only positions whose holder changed are written: a badge
+    that changes hands is moved together with its Achievement, so nothing is
+    deleted and re-created. An empty ``scope`` is the global leaderboard.
+    """
+    if scope:
+        board = rollups.board(scope, scope_id, window)
+    else:
+        board, scope_id, window = LeaderboardEntry.objects.all(), None, LeaderboardWindow.ALL_TIME
+    top = list(board.order_by(*PAGE_ORDERING).values_list("student_id", flat=True)[:len(badges)])
+
+    report = {"awarded": 0, "moved": 0, "revoked": 0, "unchanged": 0}
+    with transaction.atomic():
+        holders = {
+            badge.position: badge
+            for badge in Badge.objects.select_for_update().filter(
+                scope=scope, scope_id=scope_id, window=window, position__isnull=False
+            )
+        }
+        for position, (name, description, image) in enumerate(badges, start=1):
+            student_id = top[position - 1] if position <= len(top) else None
+            badge = holders.pop(position, None)
+            if badge is None:
+                if student_id is not None:
+                    badge = Badge.objects.create(
+                        name=name, description=description, image=image, student_id=student_id,
+                        position=position, scope=scope, scope_id=scope_id, window=window,
+                    )
+                    Achievement.objects.create(student_id=student_id, badge=badge)
+                    report["awarded"] += 1
+            elif student_id is None:
+                badge.delete()
+                report["revoked"] += 1
+            elif badge.student_id != student_id:
+                stamp = now()
+                Badge.objects.filter(pk=badge.pk).update(student_id=student_id, updated_at=stamp)
+                if not Achievement.objects.filter(badge=badge).update(student_id=student_id, awarded_at=stamp):
+                    Achievement.objects.create(student_id=student_id, badge=badge)
+                versions.bump_achievements([badge.student_id, student_id])
+                report["moved"] += 1
+            else:
+                report["unchanged"] += 1
+
+        # Positions beyond K, left over from a longer badge list
+        for badge in holders.values():
+            badge.delete()
+            report["revoked"] += 1
+    return report
+
+
+def reconcile_all_boards(badges=RANK_BADGES):
+    """Reconciles the global board and every scoped board that has rows in its current window."""
+    reports = {("", None, LeaderboardWindow.ALL_TIME): reconcile_rank_badges(badges=badges)}
+    moment = now()
+    for window in LeaderboardWindow.values:
+        boards = (
+            LeaderboardRollup.objects.filter(window=window, period_start=rollups.period_start(window, moment))
+            .values_list("scope", "scope_id")
+            .distinct()
+        )
+        for scope, scope_id in boards:
+            reports[(scope, scope_id, window)] = reconcile_rank_badges(scope, scope_id, window, badges=badges)
+    return reports
@@ -10,4 +10,31 @@ class QuestionType(models.TextChoices):
 
 class MediaType(models.TextChoices):
     VIDEO = "video", "Video"
-    PDF = "pdf", "PDF"
\ No newline at end of file
+    PDF = "pdf", "PDF"
+
+class LedgerReason(models.TextChoices):
+    ANSWER = "answer", "Correct answer"
+    GAME = "game", "Game completion"
+    OPENING_BALANCE = "opening_balance", "Opening balance"
+    COMPACTION = "compaction", "Compacted entries"
+    ADJUSTMENT = "adjustment", "Adjustment"
+    REGRADE = "regrade", "Regrade"
+
+
+class LeaderboardScope(models.TextChoices):
+    INSTITUTION = "institution", "Institution"
+    SUBJECT = "subject", "Subject"
+    GAME = "game", "Game"
+
+
+class LeaderboardWindow(models.TextChoices):
+    ALL_TIME = "all_time", "All time"
+    WEEK = "week", "Week"
+    MONTH = "month", "Month"
+
+
+class ActivityKind(models.TextChoices):
+    GAME_PLAYED = "game_played", "Game played"
+    ANSWER_SUBMITTED = "answer_submitted", "Answer submitted"
+    TRAIL_VIEWED = "trail_viewed", "Knowledge trail viewed"
+    CERTIFICATE_ISSUED = "certificate_issued", "Certificate issued"
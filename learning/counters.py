@@ -0,0 +1,136 @@
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils.timezone import now
+
+from users.choices import UserType
+
+from .models import Certificate, EntityCounter, KnowledgeTrail, StatisticsSnapshot
+
+User = get_user_model()
+
+# ``matches`` tests one instance in memory; ``condition`` is the same test as a filter, used to recount
+Counter = namedtuple("Counter", ["model", "fields", "matches", "condition"])
+
+STUDENTS = "students"
+TEACHERS = "teachers"
+KNOWLEDGE_TRAIL_VIDEOS = "knowledge_trail_videos"
+KNOWLEDGE_TRAIL_PDFS = "knowledge_trail_pdfs"
+CERTIFICATES = "certificates"
+
+COUNTERS = {
+    STUDENTS: Counter(User, ("role",), lambda user: user.role == UserType.STUDENT, Q(role=UserType.STUDENT)),
+    TEACHERS: Counter(User, ("role",), lambda user: user.role == UserType.TEACHER, Q(role=UserType.TEACHER)),
+    KNOWLEDGE_TRAIL_VIDEOS: Counter(
+        KnowledgeTrail, ("video_file",), lambda trail: bool(trail.video_file),
+        Q(video_file__isnull=False) & ~Q(video_file=""),
+    ),
+    KNOWLEDGE_TRAIL_PDFS: Counter(
+        KnowledgeTrail, ("pdf_file",), lambda trail: bool(trail.pdf_file),
+        Q(pdf_file__isnull=False) & ~Q(pdf_file=""),
+    ),
+    CERTIFICATES: Counter(Certificate, (), lambda certificate: True, Q()),
+}
+
+
+def counters_for(model):
+    return {name: counter for name, counter in COUNTERS.items() if counter.model is model}
+
+
+def tracked_fields(model):
+    return {field for counter in counters_for(model).values() for field in counter.fields}
+
+
+def memberships(instance):
+    """Names of the counters that ``instance`` currently counts towards."""
+    return {name for name, counter in counters_for(type(instance)).items() if counter.matches(instance)}
+
+
+def apply(deltas):
+    """
+    Adds each ``{name: delta}`` to its counter with an F() update, inside the
+    caller's transaction. A counter that has no row yet is recounted instead,
+    which seeds it from the table.
+    """
+    missing = []
+    for name, delta in deltas.items():
+        if delta and not EntityCounter.objects.filter(name=name).update(value=F("value") + delta, updated_at=now()):
+            missing.append(name)
+    if missing:
+        reconcile(missing)
+
+
+def get_counts(names=None):
+    """Returns ``{name: EntityCounter}`` with one primary-key read; rows never written yet are seeded first."""
+    names = list(names or COUNTERS)
+    counters = EntityCounter.objects.in_bulk(names)
+    missing = [name for name in names if name not in counters]
+    if missing:
+        reconcile(missing)
+        counters.update(EntityCounter.objects.in_bulk(missing))
+    return counters
+
+
+def count(names=None):
+    """Recounts the given counters from their tables, one aggregate query per model."""
+    names = list(names or COUNTERS)
+    counts = {}
+    for model in {COUNTERS[name].model for name in names}:
+        model_names = [name for name in names if COUNTERS[name].model is model]
+        counts.update(model.objects.aggregate(**{
+            name: Count("pk", filter=COUNTERS[name].condition) for name in model_names
+        }))
+    return counts
+
+
+def reconcile(names=None):
+    """
+    Rewrites the given counters (default: all) from a fresh count and returns
+    ``{name: drift}`` for every counter that had drifted or was missing.
+    """
+    names = list(names or COUNTERS)
+    with transaction.atomic():
+        counters = EntityCounter.objects.select_for_update().in_bulk(names)
+        counts = count(names)
+        drift = {}
+        stamp = now()
+        for name in names:
+            counter = counters.get(name)
+            if counter is None:
+                # A concurrent writer may seed the same row; its count is just as fresh
+                EntityCounter.objects.bulk_create(
+                    [EntityCounter(name=name, value=counts[name], updated_at=stamp)], ignore_conflicts=True
+                )
+                drift[name] = counts[name]
+            elif counter.value != counts[name]:
+                drift[name] = counts[name] - counter.value
+                EntityCounter.objects.filter(name=name).update(value=counts[name], updated_at=stamp)
+    return drift
+
+
+def take_snapshot():
+    """Repairs any drift, then stores every counter's value as one StatisticsSnapshot row."""
+    reconcile()
+    return StatisticsSnapshot.objects.create(
+        counts={name: counter.value for name, counter in get_counts().items()}
+    )
+
+
+def baseline(window, moment=None):
+    """
+    Counts to measure "difference" values from: the latest snapshot taken at
+    least ``window`` before ``moment``, or the oldest one when history is
+    shorter than the window. Returns ``{}`` when there are no snapshots yet.
+    """
+    cutoff = (moment or now()) - window
+    snapshot = StatisticsSnapshot.objects.filter(taken_at__lte=cutoff).order_by("-taken_at").first()
+    if snapshot is None:
+        snapshot = StatisticsSnapshot.objects.order_by("taken_at").first()
+    return snapshot.counts if snapshot else {}
+
+
+def history(window, moment=None):
+    moment = moment or now()
+    return StatisticsSnapshot.objects.filter(taken_at__gt=moment - window, taken_at__lte=moment).order_by("taken_at")
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from users.models import StudentProfile
+
+from . import recommendations, versions
+from .leaderboard import get_leaderboard
+from .models import Achievement, KnowledgeTrail
+from .serializers import AchievementSerializer, DashboardSerializer, KnowledgeTrailSerializer
+
+CACHE_PREFIX = "dashboard"
+FRAGMENT_TIMEOUT = getattr(settings, "DASHBOARD_FRAGMENT_TIMEOUT", 60 * 60)
+# Picks are random; a shorter lifetime rotates them even when nothing changes
+TRAIL_PICKS_TIMEOUT = getattr(settings, "DASHBOARD_TRAIL_PICKS_TIMEOUT", 60 * 5)
+CLASSIFICATION_SIZE = 3
+
+
+def profile_fragment(user):
+    profile = StudentProfile.objects.filter(student=user).values("points", "medals", "activities_completed").first()
+    if profile is None:
+        raise Http404
+    return {
+        "points": profile["points"],
+        "medal": profile["medals"],
+        "level": 1,
+        "activities": profile["activities_completed"],
+    }
+
+
+def achievements_fragment(user):
+    achievements = Achievement.objects.filter(student=user).select_related("badge").order_by('-awarded_at')[:4]
+    return AchievementSerializer(achievements, many=True).data
+
+
+def trails_fragment(user):
+    # Sampled from the student's cached candidate ids, then only the picked rows are loaded
+    picked_ids = recommendations.pick(user.id)
+    trails = (
+        KnowledgeTrail.objects.filter(id__in=picked_ids)
+        .select_related("subject", "assigned_by")
+        .prefetch_related("target_students")
+        .in_bulk()
+    )
+    return KnowledgeTrailSerializer([trails[trail_id] for trail_id in picked_ids if trail_id in trails], many=True).data
+
+
+def classification_fragment():
+    """The top profiles with their stats; the same for every student, so it is cached once per leaderboard version."""
+    board = get_leaderboard()
+    top_student_ids = [student_id for student_id, _ in board.top(CLASSIFICATION_SIZE)]
+    context = {"leaderboard_ranks": board.ranks(top_student_ids)}
+    profiles = DashboardSerializer.with_stats(
+        StudentProfile.objects.filter(student_id__in=top_student_ids)
+    ).in_bulk(field_name="student_id")
+
+    classification = []
+    rank = 1
+    for student_id in top_student_ids:
+        if student_id not in profiles:
+            continue
+        entry = DashboardSerializer(profiles[student_id], context=context).data
+        entry['rank'] = rank
+        classification.append(entry)
+        rank += 1
+    return classification
+
+
+def get_fragments(user):
+    """
+    Returns the dashboard sections, each served from the cache under a key
+    that carries its version counter. A change bumps only the counters it
+    affects, so only those fragments are recomputed on the next hit.
+    """
+    profile_version, achievements_version, student_trails_version, trails_version, board_version = (
+        versions.get_versions(*versions.dashboard_scopes(user.id))
+    )
+    fragments = {
+        "profile": (
+            f"{CACHE_PREFIX}:profile:{user.id}:{profile_version}",
+            lambda: profile_fragment(user), FRAGMENT_TIMEOUT,
+        ),
+        "achievements": (
+            f"{CACHE_PREFIX}:achievements:{user.id}:{achievements_version}",
+            lambda: achievements_fragment(user), FRAGMENT_TIMEOUT,
+        ),
+        "knowledge_trail": (
+            f"{CACHE_PREFIX}:trails:{user.id}:{trails_version}:{student_trails_version}",
+            lambda: trails_fragment(user), TRAIL_PICKS_TIMEOUT,
+        ),
+        "classification": (
+            f"{CACHE_PREFIX}:classification:{board_version}",
+            classification_fragment, FRAGMENT_TIMEOUT,
+        ),
+    }
+
+    cached = cache.get_many([key for key, _, _ in fragments.values()])
+    result = {}
+    for name, (key, build, timeout) in fragments.items():
+        if key not in cached:
+            cached[key] = build()
+            cache.set(key, cached[key], timeout)
+        result[name] = cached[key]
+    return result
@@ -0,0 +1,32 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class GameSessionNotFound(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+    default_detail = "Game session not found or expired."
+    default_code = 'error'
+
+
+class GameSessionFinished(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Game session has already been finished."
+    default_code = 'error'
+
+
+class InvalidLeaderboardCursor(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Invalid leaderboard cursor."
+    default_code = 'error'
+
+
+class LeaderboardScopeRequired(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "scope_id is required for this scope."
+    default_code = 'error'
+
+
+class InvalidActivityCursor(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Invalid activity cursor."
+    default_code = 'error'
@@ -0,0 +1,105 @@
+import csv
+from itertools import groupby
+
+from django.contrib.auth import get_user_model
+
+from users.choices import UserType
+from users.models import StudentProfile
+
+from .models import Game, PlayedGame, StudentAnswer
+
+User = get_user_model()
+
+CHUNK_SIZE = 2000
+
+# Spreadsheets run a text cell starting with one of these as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class Echo:
+    """File-like object whose write() hands the csv module's output straight back."""
+
+    def write(self, value):
+        return value
+
+
+def answer_rows(chunk_size=CHUNK_SIZE):
+    yield [
+        "answer_id", "student_id", "student_email", "question_id", "selected_option_id", "typed_answer",
+        "is_correct", "attempts", "graded_at",
+    ]
+    yield from StudentAnswer.objects.order_by("id").values_list(
+        "id", "student_id", "student__email", "question_id", "selected_option_id", "typed_answer",
+        "is_correct", "attempts", "graded_at",
+    ).iterator(chunk_size=chunk_size)
+
+
+def played_game_rows(chunk_size=CHUNK_SIZE):
+    yield [
+        "played_game_id", "student_id", "student_email", "game_id", "game_title", "score", "completed", "duration",
+        "played_at",
+    ]
+    yield from PlayedGame.objects.order_by("id").values_list(
+        "id", "student_id", "student__email", "game_id", "game__title", "score", "completed", "duration", "played_at",
+    ).iterator(chunk_size=chunk_size)
+
+
+def profile_rows(chunk_size=CHUNK_SIZE):
+    yield ["student_id", "student_email", "first_name", "last_name", "points", "medals", "activities_completed"]
+    yield from StudentProfile.objects.order_by("student_id").values_list(
+        "student_id", "student__email", "student__first_name", "student__last_name", "points", "medals",
+        "activities_completed",
+    ).iterator(chunk_size=chunk_size)
+
+
+def gradebook_rows(chunk_size=CHUNK_SIZE):
+    """
+    One row per student and one score column per game; empty where the
+    student has not played. Students and plays are read as two streams
+    ordered by student and merged, so only one student's row is held at a time.
+    """
+    games = list(Game.objects.order_by("id").values_list("id", "title"))
+    columns = {game_id: position for position, (game_id, _) in enumerate(games)}
+    yield ["student_id", "student_email", *[f"{title} (#{game_id})" for game_id, title in games]]
+
+    students = User.objects.filter(role=UserType.STUDENT).order_by("id").values_list("id", "email")
+    plays = groupby(
+        PlayedGame.objects.filter(student__role=UserType.STUDENT).order_by("student_id", "played_at", "id")
+        .values_list("student_id", "game_id", "score").iterator(chunk_size=chunk_size),
+        key=lambda play: play[0],
+    )
+    next_student_id, next_plays = next(plays, (None, ()))
+    for student_id, email in students.iterator(chunk_size=chunk_size):
+        scores = [""] * len(games)
+        # Plays of users the student stream no longer yields (e.g. role changed mid-export) are skipped
+        while next_student_id is not None and next_student_id < student_id:
+            next_student_id, next_plays = next(plays, (None, ()))
+        if student_id == next_student_id:
+            # Plays come oldest first, so a replayed game keeps its latest score
+            for _, game_id, score in next_plays:
+                if game_id in columns:
+                    scores[columns[game_id]] = score
+            next_student_id, next_plays = next(plays, (None, ()))
+        yield [student_id, email, *scores]
+
+
+EXPORTS = {
+    "answers": answer_rows,
+    "played-games": played_game_rows,
+    "profiles": profile_rows,
+    "gradebook": gradebook_rows,
+}
+
+
+def escape(value):
+    """Quotes user-entered text that a spreadsheet would otherwise evaluate; numbers pass through."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream(name, chunk_size=CHUNK_SIZE):
+    """Yields the export ``name`` as CSV text, one line at a time."""
+    writer = csv.writer(Echo())
+    for row in EXPORTS[name](chunk_size):
+        yield writer.writerow([escape(value) for value in row])
@@ -0,0 +1,85 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
+
+from .exceptions import GameSessionFinished, GameSessionNotFound
+from .grading import submit_game_answers
+
+SESSION_TIMEOUT = getattr(settings, "GAME_SESSION_TIMEOUT", 60 * 60 * 3)
+CACHE_PREFIX = "game-session"
+
+
+def _session_key(session_id):
+    return f"{CACHE_PREFIX}:{session_id}"
+
+
+def _answer_key(session_id, question_id):
+    return f"{CACHE_PREFIX}:{session_id}:answer:{question_id}"
+
+
+def start_session(student, game):
+    """
+    Opens a play session for ``game``. The game's question and option ids are
+    captured once here so recording answers never needs the database.
+    """
+    options_by_question = {question_id: [] for question_id in game.questions.values_list("id", flat=True)}
+    for question_id, option_id in game.questions.values_list("id", "options__id"):
+        if option_id is not None:
+            options_by_question[question_id].append(option_id)
+
+    session_id = uuid.uuid4().hex
+    session = {
+        "id": session_id,
+        "student_id": student.id,
+        "game_id": game.id,
+        "started_at": now(),
+        "questions": options_by_question,
+    }
+    cache.set(_session_key(session_id), session, SESSION_TIMEOUT)
+    return session
+
+
+def get_session(session_id, student, game_id):
+    session = cache.get(_session_key(session_id)) if session_id else None
+    if session is None or session["student_id"] != student.id or session["game_id"] != game_id:
+        raise GameSessionNotFound()
+    return session
+
+
+def record_answer(session, question_id, selected_option_id=None, typed_answer=None):
+    """Buffers one answer in the cache; answering a question again replaces the earlier answer."""
+    if question_id not in session["questions"]:
+        raise ValidationError(f"Question {question_id} does not belong to this game.")
+    if selected_option_id is not None and selected_option_id not in session["questions"][question_id]:
+        raise ValidationError(f"Option {selected_option_id} does not belong to question {question_id}.")
+
+    cache.set(
+        _answer_key(session["id"], question_id),
+        {"question_id": question_id, "selected_option_id": selected_option_id, "typed_answer": typed_answer},
+        SESSION_TIMEOUT,
+    )
+
+
+def finish_session(session, student, game):
+    """Grades every buffered answer and writes answers, PlayedGame and profile deltas in one transaction."""
+    session_key = _session_key(session["id"])
+    if not cache.add(f"{session_key}:finished", True, SESSION_TIMEOUT):
+        raise GameSessionFinished()
+
+    answer_keys = [_answer_key(session["id"], question_id) for question_id in session["questions"]]
+    answers = list(cache.get_many(answer_keys).values())
+    if not answers:
+        cache.delete(f"{session_key}:finished")
+        raise ValidationError("No answers were recorded for this session.")
+
+    try:
+        result = submit_game_answers(student, game, answers, duration=now() - session["started_at"])
+    except Exception:
+        cache.delete(f"{session_key}:finished")
+        raise
+
+    cache.delete_many([session_key, *answer_keys])
+    return result
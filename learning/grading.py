@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
+
+from . import activity
+from .choices import ActivityKind, LedgerReason
+from .models import Game, PlayedGame, PointsLedger, StudentAnswer, StudentAnswerAttempt, StudentGameProgress
+
+MEDAL_THRESHOLD = 80
+
+
+def submit_game_answers(student, game, answers, duration=None):
+    """
+    Grades a whole play of ``game`` in one transaction.
+
+    ``answers`` is a list of dicts with ``question_id``, ``selected_option_id``
+    and ``typed_answer``. Answers are upserted with a single bulk insert (earlier
+    graded answers move to the attempt history), the student's profile receives
+    one aggregated points/medal update and the ``PlayedGame`` row is upserted once.
+    A ``duration`` of None keeps the duration already stored for the play.
+    """
+    questions = {question.id: question for question in game.questions.all()}
+    for answer in answers:
+        if answer["question_id"] not in questions:
+            raise ValidationError(f"Question {answer['question_id']} does not belong to this game.")
+    graded_at = now()
+
+    with transaction.atomic():
+        previous_answers = {
+            answer.question_id: answer
+            for answer in StudentAnswer.objects.select_for_update().filter(
+                student=student, question_id__in=[answer["question_id"] for answer in answers]
+            )
+        }
+        StudentAnswerAttempt.archive(
+            [answer for answer in previous_answers.values() if answer.graded_at is not None]
+        )
+
+        student_answers = []
+        points = 0
+        newly_answered = 0
+        correct_delta = 0
+        question_deltas = {}
+        for answer in answers:
+            student_answer = StudentAnswer(
+                student=student,
+                question=questions[answer["question_id"]],
+                selected_option_id=answer.get("selected_option_id"),
+                typed_answer=answer.get("typed_answer"),
+                graded_at=graded_at,
+            )
+            student_answer.is_correct = student_answer.grade()
+
+            previous = previous_answers.get(answer["question_id"])
+            was_correct = previous.is_correct if previous else False
+            student_answer.attempts = (previous.attempts if previous else 0) + 1
+            first_answer = int(previous is None or previous.attempts == 0)
+            newly_answered += first_answer
+            delta = int(student_answer.is_correct) - int(was_correct)
+            correct_delta += delta
+            question_deltas[student_answer.question.id] = (first_answer, delta)
+            points += delta * student_answer.question.points
+            student_answers.append(student_answer)
+
+        StudentAnswer.objects.bulk_create(
+            student_answers,
+            update_conflicts=True,
+            unique_fields=["student", "question"],
+            update_fields=["selected_option", "typed_answer", "is_correct", "graded_at", "attempts", "updated_at"],
+        )
+        activity.record_many(
+            student.id, ActivityKind.ANSWER_SUBMITTED,
+            [student_answer.question_id for student_answer in student_answers], graded_at,
+        )
+        progress, completed_now = StudentGameProgress.record(
+            student, game.id, answered=newly_answered, correct=correct_delta
+        )
+        _record_shared_games(student, game.id, question_deltas)
+
+        score = int(progress.percentage_score)
+        completed = progress.total_questions > 0 and progress.answered_questions >= progress.total_questions
+        medals = 1 if completed_now and score >= MEDAL_THRESHOLD else 0
+        PointsLedger.record(student, points=points, medals=medals, reason=LedgerReason.GAME, game_id=game.id)
+
+        defaults = {"score": score, "completed": completed, "played_at": now()}
+        if duration is not None:
+            defaults["duration"] = duration
+        PlayedGame.objects.update_or_create(student=student, game=game, defaults=defaults)
+
+    return {
+        "game": game.id,
+        "answered": len(student_answers),
+        "correct": sum(1 for student_answer in student_answers if student_answer.is_correct),
+        "points": points,
+        "score": score,
+        "completed": completed,
+        "medal_awarded": bool(medals),
+    }
+
+
+def _record_shared_games(student, played_game_id, question_deltas):
+    """
+    Applies ``{question_id: (answered, correct)}`` to every other game that
+    includes those questions, the way StudentAnswer._check_and_award_medals
+    does for single answers: counters move, a game finished by this play is
+    completed with its medal, and an already finished one is rescored.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for game_id, question_id in (
+        Game.questions.through.objects.filter(question_id__in=question_deltas)
+        .exclude(game_id=played_game_id)
+        .values_list("game_id", "question_id")
+    ):
+        answered, correct = question_deltas[question_id]
+        deltas[game_id][0] += answered
+        deltas[game_id][1] += correct
+
+    for game_id, (answered, correct) in deltas.items():
+        if not answered and not correct:
+            continue
+        progress, completed_now = StudentGameProgress.record(student, game_id, answered=answered, correct=correct)
+        score = int(progress.percentage_score)
+        if completed_now:
+            medals = 1 if score >= MEDAL_THRESHOLD else 0
+            PointsLedger.record(student, medals=medals, reason=LedgerReason.GAME, game_id=game_id)
+            PlayedGame.objects.update_or_create(
+                student=student, game_id=game_id, defaults={"score": score, "completed": True, "played_at": now()}
+            )
+        elif correct and progress.answered_questions >= progress.total_questions:
+            for played_game in PlayedGame.objects.filter(student=student, game_id=game_id, completed=True):
+                played_game.score = score
+                played_game.save(update_fields=["score"])
@@ -0,0 +1,165 @@
+import math
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from .models import Option, QuestionStats, StudentAnswer
+
+CHUNK_SIZE = 50000
+
+# Thresholds behind the flags shown to teachers
+MIN_ANSWERS = 10
+EASY_P_VALUE = 0.9
+HARD_P_VALUE = 0.2
+LOW_DISCRIMINATION = 0.2
+
+NO_OPTION = -1
+
+
+def _load(np, chunk_size):
+    """Streams graded answers into one int64 array of (student, question, option, correct) rows."""
+    rows = (
+        StudentAnswer.objects.filter(graded_at__isnull=False)
+        .annotate(option=Coalesce("selected_option_id", Value(NO_OPTION)))
+        .order_by()
+        .values_list("student_id", "question_id", "option", "is_correct")
+    )
+    chunks = []
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            chunks.append(np.array(chunk, dtype=np.int64))
+            chunk = []
+    if chunk:
+        chunks.append(np.array(chunk, dtype=np.int64))
+    if not chunks:
+        return np.empty((0, 4), dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+def _correlation(np, n, sx, sxx, sy, syy, sxy):
+    """Pearson r from grouped sums; NaN where either side has no variance."""
+    numerator = n * sxy - sx * sy
+    denominator = np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _float(value):
+    return None if math.isnan(value) else round(float(value), 4)
+
+
+def analyze(chunk_size=CHUNK_SIZE):
+    """
+    Computes unsaved QuestionStats for every answered question in a single
+    vectorized pass over all graded answers.
+
+    A student's ability is their number of correct answers; discrimination
+    correlates each answer with the student's rest score (ability minus this
+    answer), so an item is never correlated with itself.
+    """
+    import numpy as np
+
+    data = _load(np, chunk_size)
+    if not len(data):
+        return []
+    students, questions, options, correct = data.T
+    correct = correct.astype(np.float64)
+
+    _, student_index = np.unique(students, return_inverse=True)
+    rest = np.bincount(student_index, weights=correct)[student_index] - correct
+
+    question_ids, question_index = np.unique(questions, return_inverse=True)
+    size = len(question_ids)
+    answers = np.bincount(question_index, minlength=size)
+    n_correct = np.bincount(question_index, weights=correct, minlength=size)
+    sum_rest = np.bincount(question_index, weights=rest, minlength=size)
+    sum_rest_sq = np.bincount(question_index, weights=rest ** 2, minlength=size)
+    discrimination = _correlation(
+        np, answers, n_correct, n_correct, sum_rest, sum_rest_sq,
+        np.bincount(question_index, weights=correct * rest, minlength=size),
+    )
+
+    # Distractors: the same correlation with "picked this option" in place of "answered correctly"
+    picked = options != NO_OPTION
+    option_ids, option_index = np.unique(options[picked], return_inverse=True)
+    option_question = np.zeros(len(option_ids), dtype=np.int64)
+    option_question[option_index] = question_index[picked]
+    picks = np.bincount(option_index, minlength=len(option_ids))
+    option_discrimination = _correlation(
+        np, answers[option_question], picks, picks, sum_rest[option_question], sum_rest_sq[option_question],
+        np.bincount(option_index, weights=rest[picked], minlength=len(option_ids)),
+    )
+    option_position = {option_id: position for position, option_id in enumerate(option_ids.tolist())}
+    question_position = {question_id: position for position, question_id in enumerate(question_ids.tolist())}
+
+    # Options nobody picked still belong in the distractor report
+    question_options = {}
+    for option_id, question_id, is_correct in (
+        Option.objects.filter(question_id__in=question_position).order_by("question_id", "id")
+        .values_list("id", "question_id", "is_correct")
+    ):
+        position = option_position.get(option_id)
+        question_options.setdefault(question_id, []).append({
+            "option": option_id,
+            "is_correct": is_correct,
+            "picks": int(picks[position]) if position is not None else 0,
+            "share": round(float(picks[position] / answers[question_position[question_id]]), 4)
+            if position is not None else 0.0,
+            "discrimination": _float(option_discrimination[position]) if position is not None else None,
+        })
+
+    computed_at = now()
+    return [
+        QuestionStats(
+            question_id=question_id,
+            answers=int(answers[position]),
+            correct=int(n_correct[position]),
+            p_value=round(float(n_correct[position] / answers[position]), 4),
+            discrimination=_float(discrimination[position]),
+            options=question_options.get(question_id, []),
+            computed_at=computed_at,
+        )
+        for question_id, position in question_position.items()
+    ]
+
+
+def run(chunk_size=CHUNK_SIZE):
+    """Recomputes and stores every question's stats; questions left with no answers lose theirs."""
+    started_at = now()
+    stats = analyze(chunk_size)
+    with transaction.atomic():
+        QuestionStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["question"],
+            update_fields=["answers", "correct", "p_value", "discrimination", "options", "computed_at"],
+            batch_size=1000,
+        )
+        # Every row written above is stamped after started_at
+        QuestionStats.objects.filter(computed_at__lt=started_at).delete()
+    return len(stats)
+
+
+def flags(stats):
+    """Plain-language warnings for teachers; empty until a question has enough answers."""
+    if stats.answers < MIN_ANSWERS:
+        return []
+    found = []
+    if stats.p_value >= EASY_P_VALUE:
+        found.append("too_easy")
+    elif stats.p_value <= HARD_P_VALUE:
+        found.append("too_hard")
+    if stats.discrimination is not None and stats.discrimination < LOW_DISCRIMINATION:
+        found.append("low_discrimination")
+    if any(option["picks"] == 0 for option in stats.options if not option["is_correct"]):
+        found.append("unused_distractor")
+    if any(
+        option["discrimination"] is not None and option["discrimination"] > 0
+        for option in stats.options if not option["is_correct"]
+    ):
+        found.append("distractor_attracts_strong_students")
+    return found
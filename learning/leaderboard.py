@@ -0,0 +1,329 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Func, Max, OuterRef, Q, Subquery, Sum
+from django.utils.dateparse import parse_datetime
+
+from . import versions
+from .exceptions import InvalidLeaderboardCursor
+
+from .models import LeaderboardEntry, PlayedGame
+
+REDIS_KEY = "leaderboard:total_score"
+REBUILD_CHUNK_SIZE = 5000
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Total order used for paging: ties on score go to the most recently active, then the lowest id
+PAGE_ORDERING = [F("total_score").desc(), F("last_activity").desc(nulls_last=True), F("student_id").asc()]
+
+
+class DatabaseLeaderboard:
+    """
+    Serves the leaderboard straight from the LeaderboardEntry table. Ranks are
+    competition-style: one plus the number of strictly higher totals, which is
+    an index range count on total_score.
+    """
+
+    def sync(self, scores, removed):
+        # The table is written by refresh_students, nothing else to mirror
+        pass
+
+    def rebuild(self):
+        pass
+
+    def score(self, student_id):
+        return LeaderboardEntry.objects.filter(student_id=student_id).values_list("total_score", flat=True).first()
+
+    def rank(self, student_id):
+        score = self.score(student_id)
+        if score is None:
+            return None
+        return LeaderboardEntry.objects.filter(total_score__gt=score).count() + 1
+
+    def ranks(self, student_ids):
+        """Ranks many students in one query; students not on the board map to None."""
+        higher = (
+            LeaderboardEntry.objects.filter(total_score__gt=OuterRef("total_score"))
+            .order_by()
+            .annotate(count=Func(F("id"), function="COUNT"))
+            .values("count")
+        )
+        ranked = dict(
+            LeaderboardEntry.objects.filter(student_id__in=student_ids)
+            .annotate(rank=Subquery(higher) + 1)
+            .values_list("student_id", "rank")
+        )
+        return {student_id: ranked.get(student_id) for student_id in student_ids}
+
+    def range(self, offset, limit):
+        """Returns ``[(student_id, total_score), ...]`` for positions offset..offset+limit-1."""
+        entries = LeaderboardEntry.objects.order_by(*PAGE_ORDERING)
+        return list(entries.values_list("student_id", "total_score")[offset:offset + limit])
+
+    def top(self, limit):
+        return self.range(0, limit)
+
+    def count(self):
+        return LeaderboardEntry.objects.count()
+
+
+class RedisLeaderboard:
+    """
+    Mirrors LeaderboardEntry into a Redis sorted set (member: student id,
+    score: total score) so rank, top-N and range reads are O(log n) and never
+    touch the database.
+    """
+
+    def __init__(self, url, key=REDIS_KEY):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    def sync(self, scores, removed):
+        pipeline = self.client.pipeline()
+        if scores:
+            pipeline.zadd(self.key, scores)
+        if removed:
+            pipeline.zrem(self.key, *removed)
+        pipeline.execute()
+
+    def rebuild(self):
+        # Fill a scratch key and swap it in, so readers never see a half-built set
+        scratch_key = f"{self.key}:rebuild"
+        self.client.delete(scratch_key)
+        entries = LeaderboardEntry.objects.values_list("student_id", "total_score")
+        chunk = {}
+        for student_id, total_score in entries.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+            chunk[student_id] = total_score
+            if len(chunk) >= REBUILD_CHUNK_SIZE:
+                self.client.zadd(scratch_key, chunk)
+                chunk = {}
+        if chunk:
+            self.client.zadd(scratch_key, chunk)
+        if self.client.exists(scratch_key):
+            self.client.rename(scratch_key, self.key)
+        else:
+            self.client.delete(self.key)
+
+    def score(self, student_id):
+        score = self.client.zscore(self.key, student_id)
+        return None if score is None else int(score)
+
+    def rank(self, student_id):
+        score = self.score(student_id)
+        if score is None:
+            return None
+        return self.client.zcount(self.key, f"({score}", "+inf") + 1
+
+    def ranks(self, student_ids):
+        """Ranks many students in two pipelined round trips; students not on the board map to None."""
+        student_ids = list(student_ids)
+        pipeline = self.client.pipeline()
+        for student_id in student_ids:
+            pipeline.zscore(self.key, student_id)
+        scores = dict(zip(student_ids, pipeline.execute()))
+
+        ranked_ids = [student_id for student_id in student_ids if scores[student_id] is not None]
+        for student_id in ranked_ids:
+            pipeline.zcount(self.key, f"({int(scores[student_id])}", "+inf")
+        ranks = {student_id: higher + 1 for student_id, higher in zip(ranked_ids, pipeline.execute())}
+        return {student_id: ranks.get(student_id) for student_id in student_ids}
+
+    def range(self, offset, limit):
+        if limit <= 0:
+            return []
+        members = self.client.zrevrange(self.key, offset, offset + limit - 1, withscores=True)
+        return [(int(member), int(score)) for member, score in members]
+
+    def top(self, limit):
+        return self.range(0, limit)
+
+    def count(self):
+        return self.client.zcard(self.key)
+
+
+_leaderboard = None
+
+
+def get_leaderboard():
+    """Returns the configured leaderboard: Redis when LEADERBOARD_REDIS_URL is set, else the database."""
+    global _leaderboard
+    if _leaderboard is None:
+        url = getattr(settings, "LEADERBOARD_REDIS_URL", None)
+        _leaderboard = RedisLeaderboard(url) if url else DatabaseLeaderboard()
+    return _leaderboard
+
+
+def refresh_students(student_ids):
+    """
+    Recomputes the materialized totals for ``student_ids`` from PlayedGame with
+    one grouped query and upserts them. Students left with no played games
+    drop off the board. The Redis mirror is updated once the transaction commits.
+    """
+    student_ids = set(student_ids)
+    if not student_ids:
+        return
+
+    totals = (
+        PlayedGame.objects.filter(student_id__in=student_ids)
+        .values("student_id")
+        .annotate(total_score=Sum("score"), games_played=Count("id"), last_activity=Max("played_at"))
+        .order_by()
+    )
+    entries = [LeaderboardEntry(**row) for row in totals]
+    LeaderboardEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["student"],
+        update_fields=["total_score", "games_played", "last_activity"],
+    )
+    scores = {entry.student_id: entry.total_score for entry in entries}
+    removed = student_ids - scores.keys()
+    if removed:
+        LeaderboardEntry.objects.filter(student_id__in=removed).delete()
+
+    leaderboard = get_leaderboard()
+    transaction.on_commit(lambda: leaderboard.sync(scores, removed))
+    versions.bump_students(student_ids)
+
+
+def rebuild():
+    """Recomputes every LeaderboardEntry from PlayedGame and reloads the configured backend."""
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        totals = (
+            PlayedGame.objects.values("student_id")
+            .annotate(total_score=Sum("score"), games_played=Count("id"), last_activity=Max("played_at"))
+            .order_by()
+        )
+        LeaderboardEntry.objects.bulk_create(
+            [LeaderboardEntry(**row) for row in totals.iterator()],
+            batch_size=REBUILD_CHUNK_SIZE,
+        )
+    get_leaderboard().rebuild()
+    return LeaderboardEntry.objects.count()
+
+
+def _after(position):
+    """Keyset filter for entries strictly after ``(total_score, last_activity, student_id)`` in PAGE_ORDERING."""
+    total_score, last_activity, student_id = position
+    same_score = Q(total_score=total_score)
+    if last_activity is None:
+        return Q(total_score__lt=total_score) | (same_score & Q(last_activity__isnull=True, student_id__gt=student_id))
+    return (
+        Q(total_score__lt=total_score)
+        | (same_score & (Q(last_activity__lt=last_activity) | Q(last_activity__isnull=True)))
+        | (same_score & Q(last_activity=last_activity, student_id__gt=student_id))
+    )
+
+
+def _before(position):
+    """Keyset filter for entries strictly before ``(total_score, last_activity, student_id)`` in PAGE_ORDERING."""
+    total_score, last_activity, student_id = position
+    same_score = Q(total_score=total_score)
+    if last_activity is None:
+        return (
+            Q(total_score__gt=total_score)
+            | (same_score & Q(last_activity__isnull=False))
+            | (same_score & Q(last_activity__isnull=True, student_id__lt=student_id))
+        )
+    return (
+        Q(total_score__gt=total_score)
+        | (same_score & Q(last_activity__gt=last_activity))
+        | (same_score & Q(last_activity=last_activity, student_id__lt=student_id))
+    )
+
+
+def _assign_ranks(board, entries):
+    """
+    Sets a competition-style ``rank`` on a contiguous run of ``entries`` in
+    PAGE_ORDERING with two index counts, however deep the run starts.
+    """
+    first_score = entries[0].total_score
+    higher = board.filter(total_score__gt=first_score).count()
+    at_least_first = board.filter(total_score__gte=first_score).count()
+
+    # Everything between the first score and a lower one in the run is in the run
+    rank = higher + 1
+    below_first = 0
+    previous_score = first_score
+    for entry in entries:
+        if entry.total_score != previous_score:
+            rank = at_least_first + below_first + 1
+            previous_score = entry.total_score
+        if entry.total_score != first_score:
+            below_first += 1
+        entry.rank = rank
+
+
+def page(after=None, limit=PAGE_SIZE, board=None):
+    """
+    Returns ``(entries, next_position)`` for one page of the ranking using
+    keyset pagination on the leaderboard_order_idx index, so a deep page costs
+    the same as the first. Each entry gets a competition-style ``rank``; the
+    page needs two extra index counts for that, whatever its depth.
+
+    ``board`` pages a scoped board instead, e.g. ``learning.rollups.board()``.
+    """
+    if board is None:
+        board = LeaderboardEntry.objects.all()
+    entries = board.select_related("student__profile").order_by(*PAGE_ORDERING)
+    if after is not None:
+        entries = entries.filter(_after(after))
+    entries = list(entries[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if not entries:
+        return [], None
+
+    _assign_ranks(board, entries)
+    last = entries[-1]
+    next_position = (last.total_score, last.last_activity, last.student_id) if has_more else None
+    return entries, next_position
+
+
+def around(student_id, radius, board=None):
+    """
+    Returns the student's entry with up to ``radius`` neighbours on each side,
+    ranked, or an empty list if the student is not on the board. Both sides
+    are keyset range reads on the ordering index: O(log n + radius).
+    """
+    if board is None:
+        board = LeaderboardEntry.objects.all()
+    entries = board.select_related("student__profile")
+    me = entries.filter(student_id=student_id).first()
+    if me is None:
+        return []
+
+    position = (me.total_score, me.last_activity, me.student_id)
+    above = list(
+        entries.filter(_before(position)).order_by(
+            F("total_score").asc(), F("last_activity").asc(nulls_first=True), F("student_id").desc()
+        )[:radius]
+    )
+    below = list(entries.filter(_after(position)).order_by(*PAGE_ORDERING)[:radius])
+    window = above[::-1] + [me] + below
+    _assign_ranks(board, window)
+    return window
+
+
+def encode_cursor(position):
+    total_score, last_activity, student_id = position
+    payload = [total_score, last_activity.isoformat() if last_activity else None, student_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        total_score, last_activity, student_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if last_activity is not None:
+            last_activity = parse_datetime(last_activity)
+            if last_activity is None:
+                raise ValueError
+        return int(total_score), last_activity, int(student_id)
+    except (ValueError, TypeError):
+        raise InvalidLeaderboardCursor()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from learning import item_analysis
+
+
+class Command(BaseCommand):
+    help = "Recomputes difficulty, discrimination and distractor statistics for every answered question."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=item_analysis.CHUNK_SIZE,
+            help="Answers fetched per database round trip.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            analyzed = item_analysis.run(chunk_size=options["chunk_size"])
+        except ImportError as exc:
+            raise CommandError(f"Item analysis needs NumPy ({exc}); install the project requirements.")
+        self.stdout.write(self.style.SUCCESS(f"Analyzed {analyzed} question(s)."))
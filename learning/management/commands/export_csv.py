@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from learning import exports
+
+
+class Command(BaseCommand):
+    help = "Streams an export (answers, played-games, profiles or gradebook) as CSV to stdout or a file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("export", choices=sorted(exports.EXPORTS))
+        parser.add_argument("--output", metavar="PATH", help="Write to PATH instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = exports.stream(options["export"], chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                output.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['export']} export to {options['output']}."))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
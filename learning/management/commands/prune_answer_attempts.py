@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils.timezone import now
+
+from learning.models import StudentAnswerAttempt
+
+DELETE_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Prunes the answer attempt history by age and/or keeps only the latest attempts per student and question."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, metavar="DAYS", help="Delete attempts older than DAYS.")
+        parser.add_argument("--keep", type=int, metavar="N", help="Keep only the N most recent attempts per student and question.")
+
+    def handle(self, *args, **options):
+        if options["older_than"] is None and options["keep"] is None:
+            raise CommandError("Pass --older-than and/or --keep.")
+
+        deleted = 0
+        if options["older_than"] is not None:
+            cutoff = now() - timedelta(days=options["older_than"])
+            deleted += self.delete_in_batches(
+                StudentAnswerAttempt.objects.filter(answered_at__lt=cutoff).values_list("id", flat=True)
+            )
+
+        if options["keep"] is not None:
+            ranked = StudentAnswerAttempt.objects.annotate(
+                position=Window(
+                    RowNumber(),
+                    partition_by=[F("student_id"), F("question_id")],
+                    order_by=[F("answered_at").desc(nulls_last=True), F("id").desc()],
+                )
+            ).filter(position__gt=options["keep"])
+            deleted += self.delete_in_batches(ranked.values_list("id", flat=True))
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} answer attempt(s)."))
+
+    def delete_in_batches(self, ids):
+        # Deleted rows drop out of ``ids`` (and never shift the ranks of the kept ones),
+        # so the first batch is simply read again until nothing is left
+        ids = ids.order_by("id")
+        deleted = 0
+        while batch := list(ids[:DELETE_BATCH_SIZE]):
+            count, _ = StudentAnswerAttempt.objects.filter(id__in=batch).delete()
+            deleted += count
+        return deleted
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from learning import leaderboard, rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the materialized leaderboard (and its Redis mirror, if configured) "
+        "and the scoped/windowed rollups from PlayedGame."
+    )
+
+    def handle(self, *args, **options):
+        count = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rebuilt with {count} student(s)."))
+        cells = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rollups rebuilt with {cells} row(s)."))
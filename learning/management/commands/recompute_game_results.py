@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from learning.recompute import DEFAULT_BATCH_SIZE, recompute_game_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes game progress and PlayedGame scores/completion from stored answers. "
+        "With --reset-medals, medal counts are reset to one per game finished at or above the threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--reset-medals", action="store_true",
+            help="Also reset every student's medals to the count earned from games; medals from any other source are lost.",
+        )
+
+    def handle(self, *args, **options):
+        report = recompute_game_results(
+            dry_run=options["dry_run"], batch_size=options["batch_size"], reset_medals=options["reset_medals"]
+        )
+        prefix = "Would change" if options["dry_run"] else "Changed"
+        self.stdout.write(f"Checked {report['pairs']} student/game pair(s).")
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}: {report['progress_created']} progress row(s) created, "
+            f"{report['progress_updated']} updated; {report['played_games_created']} played game(s) created, "
+            f"{report['played_games_updated']} updated; medals adjusted for {report['medal_adjustments']} student(s)."
+        ))
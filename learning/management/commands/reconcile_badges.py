@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.badges import reconcile_all_boards, reconcile_rank_badges
+from learning.choices import LeaderboardScope, LeaderboardWindow
+
+
+class Command(BaseCommand):
+    help = "Moves leaderboard position badges (Gold/Silver/Bronze) to the current top students."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scope", choices=LeaderboardScope.values, help="Reconcile one scoped board.")
+        parser.add_argument("--scope-id", type=int)
+        parser.add_argument("--window", choices=LeaderboardWindow.values, default=LeaderboardWindow.ALL_TIME)
+        parser.add_argument("--all-boards", action="store_true", help="Reconcile the global board and every active scoped board.")
+
+    def handle(self, *args, **options):
+        if options["all_boards"]:
+            reports = reconcile_all_boards()
+        elif options["scope"]:
+            if options["scope_id"] is None:
+                raise CommandError("--scope-id is required with --scope.")
+            board = (options["scope"], options["scope_id"], options["window"])
+            reports = {board: reconcile_rank_badges(*board)}
+        else:
+            reports = {("", None, LeaderboardWindow.ALL_TIME): reconcile_rank_badges()}
+
+        for (scope, scope_id, window), report in reports.items():
+            label = f"{scope}:{scope_id} ({window})" if scope else "global"
+            self.stdout.write(
+                f"{label}: {report['awarded']} awarded, {report['moved']} moved, "
+                f"{report['revoked']} revoked, {report['unchanged']} unchanged"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(reports)} board(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from learning import counters
+
+
+class Command(BaseCommand):
+    help = "Recounts the statistics counters from their tables, repairing drift left by bulk writes."
+
+    def handle(self, *args, **options):
+        drift = counters.reconcile()
+        for name, delta in drift.items():
+            self.stdout.write(f"{name}: off by {delta:+}")
+        self.stdout.write(self.style.SUCCESS(f"Fixed {len(drift)} drifted counter(s)."))
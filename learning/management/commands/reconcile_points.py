@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from learning import versions
+from learning.choices import LedgerReason
+from learning.models import PointsLedger
+from users.models import StudentProfile
+
+
+class Command(BaseCommand):
+    help = "Reconciles StudentProfile points/medals with the points ledger and optionally compacts old entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--compact-older-than",
+            type=int,
+            metavar="DAYS",
+            help="Collapse ledger entries older than DAYS into one entry per student.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without writing anything.")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        if options["compact_older_than"] is not None and not dry_run:
+            cutoff = now() - timedelta(days=options["compact_older_than"])
+            compacted = self.compact(cutoff)
+            self.stdout.write(f"Compacted {compacted} ledger entries older than {cutoff:%Y-%m-%d}.")
+
+        fixed = self.reconcile(dry_run)
+        verb = "Found" if dry_run else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} drifted profile(s)."))
+
+    def compact(self, cutoff):
+        old_entries = PointsLedger.objects.filter(created_at__lt=cutoff)
+        with transaction.atomic():
+            totals = list(
+                old_entries.values("student_id").annotate(
+                    points=Sum("points_delta"), medals=Sum("medals_delta")
+                )
+            )
+            deleted, _ = old_entries.delete()
+            PointsLedger.objects.bulk_create(
+                [
+                    PointsLedger(
+                        student_id=total["student_id"],
+                        points_delta=total["points"],
+                        medals_delta=total["medals"],
+                        reason=LedgerReason.COMPACTION,
+                    )
+                    for total in totals
+                    if total["points"] or total["medals"]
+                ],
+                batch_size=1000,
+            )
+        return deleted
+
+    def reconcile(self, dry_run):
+        totals = {
+            row["student_id"]: (row["points"], row["medals"])
+            for row in PointsLedger.objects.values("student_id").annotate(
+                points=Sum("points_delta"), medals=Sum("medals_delta")
+            )
+        }
+
+        drifted = []
+        for student_id, points, medals in StudentProfile.objects.values_list("student_id", "points", "medals").iterator():
+            expected = totals.get(student_id, (0, 0))
+            if (points, medals) != expected:
+                drifted.append(student_id)
+                self.stdout.write(
+                    f"Student {student_id}: profile {points} pts/{medals} medals, ledger {expected[0]} pts/{expected[1]} medals"
+                )
+
+        if drifted and not dry_run:
+            # Recompute from the ledger in the UPDATE itself so concurrent awards are not lost
+            ledger = PointsLedger.objects.filter(student_id=OuterRef("student_id")).values("student_id")
+            StudentProfile.objects.filter(student_id__in=drifted).update(
+                points=Coalesce(Subquery(ledger.annotate(total=Sum("points_delta")).values("total")), Value(0), output_field=IntegerField()),
+                medals=Coalesce(Subquery(ledger.annotate(total=Sum("medals_delta")).values("total")), Value(0), output_field=IntegerField()),
+            )
+            versions.bump_students(drifted)
+        return len(drifted)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from learning import recommendations
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the cached knowledge trail candidate lists used for dashboard recommendations."
+
+    def handle(self, *args, **options):
+        count = recommendations.refresh_all()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {count} recommendation cohort(s)."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.models import Game, Question
+from learning.regrade import DEFAULT_CHUNK_SIZE, regrade_questions
+
+
+class Command(BaseCommand):
+    help = "Re-grades stored answers after a question's answer key changed and adjusts points and scores."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--question", type=int, action="append", default=[], help="Question id (repeatable).")
+        parser.add_argument("--game", type=int, action="append", default=[], help="Regrade every question of this game (repeatable).")
+        parser.add_argument("--all", action="store_true", help="Regrade every question.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            question_ids = list(Question.objects.values_list("id", flat=True))
+        else:
+            question_ids = set(options["question"])
+            question_ids.update(
+                Game.questions.through.objects.filter(game_id__in=options["game"]).values_list("question_id", flat=True)
+            )
+        if not question_ids:
+            raise CommandError("Pass --question, --game or --all.")
+
+        report = regrade_questions(question_ids, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Regraded {report['answers']} answer(s) to {report['questions']} question(s): "
+            f"{report['now_correct']} now correct, {report['now_incorrect']} now incorrect, "
+            f"{report['students']} student(s) adjusted."
+        ))
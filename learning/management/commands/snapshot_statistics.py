@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from learning import counters
+
+
+class Command(BaseCommand):
+    help = "Reconciles the statistics counters and stores them as a snapshot; schedule daily or hourly."
+
+    def handle(self, *args, **options):
+        snapshot = counters.take_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"Stored statistics snapshot {snapshot.id} at {snapshot.taken_at:%Y-%m-%d %H:%M}."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from learning import student_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds every student's stats rollup, then snapshots it as the baseline for the next deltas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=student_stats.REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        refreshed = student_stats.rebuild(batch_size=options["batch_size"])
+        snapshots = student_stats.take_snapshots(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} rollup(s) and stored {snapshots} snapshot(s)."))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-17 02:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0013_studentgameprogress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points_delta', models.IntegerField(default=0)),
+                ('medals_delta', models.IntegerField(default=0)),
+                ('reason', models.CharField(choices=[('answer', 'Correct answer'), ('game', 'Game completion'), ('opening_balance', 'Opening balance'), ('compaction', 'Compacted entries'), ('adjustment', 'Adjustment')], max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('answer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='learning.studentanswer')),
+                ('game', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='learning.game')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_ledger', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'created_at'], name='learning_po_student_b6aa90_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def seed_opening_balances(apps, schema_editor):
+    StudentProfile = apps.get_model("users", "StudentProfile")
+    PointsLedger = apps.get_model("learning", "PointsLedger")
+
+    # Existing totals predate the ledger, so carry them over as one opening entry each
+    entries = [
+        PointsLedger(
+            student_id=profile.student_id,
+            points_delta=profile.points,
+            medals_delta=profile.medals,
+            reason="opening_balance",
+        )
+        for profile in StudentProfile.objects.exclude(points=0, medals=0).iterator()
+    ]
+    PointsLedger.objects.bulk_create(entries, batch_size=1000)
+
+
+def remove_opening_balances(apps, schema_editor):
+    PointsLedger = apps.get_model("learning", "PointsLedger")
+    PointsLedger.objects.filter(reason="opening_balance").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("learning", "0014_pointsledger"),
+        ("users", "0010_notificationrecipient_created_at_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_opening_balances, remove_opening_balances),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+def mark_existing_answers_graded(apps, schema_editor):
+    StudentAnswer = apps.get_model("learning", "StudentAnswer")
+    # Answers saved before this field existed were graded synchronously
+    StudentAnswer.objects.filter(graded_at__isnull=True).update(graded_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0015_seed_points_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentanswer',
+            name='graded_at',
+            field=models.DateTimeField(blank=True, help_text='When the answer was graded. Empty while grading is pending.', null=True),
+        ),
+        migrations.RunPython(mark_existing_answers_graded, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0016_studentanswer_graded_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pointsledger',
+            name='reason',
+            field=models.CharField(choices=[('answer', 'Correct answer'), ('game', 'Game completion'), ('opening_balance', 'Opening balance'), ('compaction', 'Compacted entries'), ('adjustment', 'Adjustment'), ('regrade', 'Regrade')], max_length=50),
+        ),
+    ]
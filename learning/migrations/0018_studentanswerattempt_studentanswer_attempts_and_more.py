@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0017_alter_pointsledger_reason'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAnswerAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('typed_answer', models.TextField(blank=True, null=True)),
+                ('is_correct', models.BooleanField(default=False)),
+                ('answered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='studentanswer',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, help_text="How many times the student's answer to this question has been graded."),
+        ),
+        migrations.AddField(
+            model_name='studentanswerattempt',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='learning.question'),
+        ),
+        migrations.AddField(
+            model_name='studentanswerattempt',
+            name='selected_option',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='learning.option'),
+        ),
+        migrations.AddField(
+            model_name='studentanswerattempt',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswerattempt',
+            index=models.Index(fields=['student', 'question', 'answered_at'], name='learning_st_student_29229e_idx'),
+        ),
+    ]
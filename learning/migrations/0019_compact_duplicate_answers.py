@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def compact_duplicate_answers(apps, schema_editor):
+    StudentAnswer = apps.get_model("learning", "StudentAnswer")
+    StudentAnswerAttempt = apps.get_model("learning", "StudentAnswerAttempt")
+
+    StudentAnswer.objects.filter(graded_at__isnull=False).update(attempts=1)
+
+    # Keep the newest row per (student, question) and move the rest to the attempt history
+    duplicates = (
+        StudentAnswer.objects.values("student_id", "question_id")
+        .annotate(rows=Count("id"), latest_id=Max("id"))
+        .filter(rows__gt=1)
+    )
+    for duplicate in list(duplicates):
+        older = StudentAnswer.objects.filter(
+            student_id=duplicate["student_id"], question_id=duplicate["question_id"], id__lt=duplicate["latest_id"]
+        )
+        StudentAnswerAttempt.objects.bulk_create([
+            StudentAnswerAttempt(
+                student_id=answer.student_id,
+                question_id=answer.question_id,
+                selected_option_id=answer.selected_option_id,
+                typed_answer=answer.typed_answer,
+                is_correct=answer.is_correct,
+                answered_at=answer.graded_at,
+            )
+            for answer in older
+        ])
+        older.delete()
+        StudentAnswer.objects.filter(pk=duplicate["latest_id"]).update(attempts=duplicate["rows"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0018_studentanswerattempt_studentanswer_attempts_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_duplicate_answers, migrations.RunPython.noop),
+    ]
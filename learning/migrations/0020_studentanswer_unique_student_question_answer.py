@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0019_compact_duplicate_answers'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='studentanswer',
+            constraint=models.UniqueConstraint(fields=('student', 'question'), name='unique_student_question_answer'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import Count, Max, Sum
+
+
+def seed_leaderboard_entries(apps, schema_editor):
+    PlayedGame = apps.get_model("learning", "PlayedGame")
+    LeaderboardEntry = apps.get_model("learning", "LeaderboardEntry")
+
+    totals = (
+        PlayedGame.objects.values("student_id")
+        .annotate(total_score=Sum("score"), games_played=Count("id"), last_activity=Max("played_at"))
+        .order_by()
+    )
+    LeaderboardEntry.objects.bulk_create(
+        [LeaderboardEntry(**row) for row in totals.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("learning", "0021_leaderboardentry"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_leaderboard_entries, migrations.RunPython.noop),
+    ]
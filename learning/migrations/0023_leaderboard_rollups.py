@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0022_seed_leaderboard_entries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='subject',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='games', to='learning.subject'),
+        ),
+        migrations.CreateModel(
+            name='LeaderboardRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('institution', 'Institution'), ('subject', 'Subject'), ('game', 'Game')], max_length=20)),
+                ('scope_id', models.PositiveIntegerField()),
+                ('window', models.CharField(choices=[('all_time', 'All time'), ('week', 'Week'), ('month', 'Month')], max_length=20)),
+                ('period_start', models.DateField()),
+                ('total_score', models.PositiveIntegerField(default=0)),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('last_activity', models.DateTimeField(blank=True, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scope', 'scope_id', 'window', 'period_start', '-total_score', '-last_activity', 'student'], name='leaderboard_rollup_order_idx'), models.Index(fields=['student', 'scope', 'scope_id'], name='leaderboard_rollup_student_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'scope_id', 'window', 'period_start', 'student'), name='unique_leaderboard_rollup_cell')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0023_leaderboard_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='badge',
+            name='position',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Leaderboard position this badge marks; empty for other badges.', null=True),
+        ),
+        migrations.AddField(
+            model_name='badge',
+            name='scope',
+            field=models.CharField(blank=True, choices=[('institution', 'Institution'), ('subject', 'Subject'), ('game', 'Game')], help_text='Empty for the global leaderboard.', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='badge',
+            name='scope_id',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='badge',
+            name='window',
+            field=models.CharField(blank=True, choices=[('all_time', 'All time'), ('week', 'Week'), ('month', 'Month')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='badge',
+            index=models.Index(fields=['scope', 'scope_id', 'window', 'position'], name='badge_board_position_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+RANK_BADGE_POSITIONS = {"Gold": 1, "Silver": 2, "Bronze": 3}
+
+
+def backfill_positions(apps, schema_editor):
+    Badge = apps.get_model("learning", "Badge")
+    # Badges from the old award_top_students_badges belong to the global all-time board
+    for name, position in RANK_BADGE_POSITIONS.items():
+        Badge.objects.filter(name=name, position__isnull=True).update(position=position, window="all_time")
+
+
+def clear_positions(apps, schema_editor):
+    Badge = apps.get_model("learning", "Badge")
+    Badge.objects.filter(name__in=RANK_BADGE_POSITIONS, scope="").update(position=None, window="")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("learning", "0024_badge_board_position"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_positions, clear_positions),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0025_backfill_rank_badge_positions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='knowledgetrail',
+            index=models.Index(fields=['is_public', '-recommended', '-created_at'], name='knowledge_trail_candidates_idx'),
+        ),
+    ]
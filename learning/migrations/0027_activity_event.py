@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0026_knowledge_trail_candidates_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('game_played', 'Game played'), ('answer_submitted', 'Answer submitted'), ('trail_viewed', 'Knowledge trail viewed'), ('certificate_issued', 'Certificate issued')], max_length=30)),
+                ('object_id', models.PositiveIntegerField()),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', '-occurred_at', '-id'], name='activity_timeline_idx')],
+            },
+        ),
+    ]
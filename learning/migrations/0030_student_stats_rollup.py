@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0029_statistics_snapshot'),
+        ('users', '0010_notificationrecipient_created_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStatsRollup',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats_rollup', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('points', models.IntegerField(default=0)),
+                ('medals', models.IntegerField(default=0)),
+                ('played_games', models.PositiveIntegerField(default=0)),
+                ('certificates', models.PositiveIntegerField(default=0)),
+                ('baseline_points', models.IntegerField(default=0)),
+                ('baseline_medals', models.IntegerField(default=0)),
+                ('baseline_played_games', models.PositiveIntegerField(default=0)),
+                ('baseline_certificates', models.PositiveIntegerField(default=0)),
+                ('baseline_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('points', models.IntegerField(default=0)),
+                ('medals', models.IntegerField(default=0)),
+                ('played_games', models.PositiveIntegerField(default=0)),
+                ('certificates', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'taken_at'], name='learning_st_student_1fcbf2_idx')],
+            },
+        ),
+    ]
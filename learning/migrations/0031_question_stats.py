@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-17 03:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0030_student_stats_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='learning.question')),
+                ('answers', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('p_value', models.FloatField(help_text='Share of answers that are correct; low means hard.')),
+                ('discrimination', models.FloatField(blank=True, help_text="Point-biserial correlation between answering correctly and the rest of the student's score.", null=True)),
+                ('options', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,9 +1,11 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils.timezone import now
 
 from avag_learning.models.models import BaseModel
-from learning.choices import  MediaType, QuestionType
+from learning.answer_keys import get_answer_key, grade_answer
+from learning.choices import  ActivityKind, LeaderboardScope, LeaderboardWindow, LedgerReason, MediaType, QuestionType
 from users.models import StudentProfile
 
 User = get_user_model()
@@ -57,103 +59,188 @@ class Option(BaseModel):
     
 
 class StudentAnswer(BaseModel):
+    """
+    The student's latest answer to a question; there is at most one row per
+    (student, question). Earlier attempts live in StudentAnswerAttempt.
+    """
     student = models.ForeignKey(User, on_delete=models.CASCADE)
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     selected_option = models.ForeignKey(Option, on_delete=models.CASCADE, null=True, blank=True)
     typed_answer = models.TextField(null=True, blank=True, help_text="The student's answer for 'fill in the blank' questions.")
     is_correct = models.BooleanField(default=False)
+    graded_at = models.DateTimeField(null=True, blank=True, help_text="When the answer was graded. Empty while grading is pending.")
+    attempts = models.PositiveIntegerField(default=0, help_text="How many times the student's answer to this question has been graded.")
 
-    def save(self, *args, **kwargs):
-        is_correct = False
-
-        if self.question.question_type == QuestionType.FILL_IN_THE_BLANK:
-            if self.typed_answer and self.question.correct_answer:
-                is_correct = self.typed_answer.strip().lower() == self.question.correct_answer.strip().lower()
-
-        elif self.question.question_type == QuestionType.MATCH_THE_COLUMN and self.typed_answer:
-            try:
-                submitted_ids = list(map(int, self.typed_answer.strip().split(',')))
-                correct_ids = list(self.question.options.order_by("order").values_list("id", flat=True))
-                is_correct = submitted_ids == correct_ids
-            except ValueError:
-                pass
-        elif self.question.question_type == QuestionType.WORD_HUNT and self.typed_answer:
-            try:
-                # Count how many options are marked is_correct=True
-                correct_count = self.question.options.filter(is_correct=True).count()
-                submitted_count = int(self.typed_answer.strip())
-
-                if submitted_count == correct_count:
-                    self._update_student_points(self.question.points)
-            except ValueError:
-                pass  # Invalid number submitted by student
-
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "question"], name="unique_student_question_answer"),
+        ]
+
+    def save(self, *args, grade=True, **kwargs):
+        """
+        Upserts the canonical answer. A previously graded answer is moved to
+        the attempt history, and points and progress change by the difference
+        from it. grade=False stores the raw answer; learning.tasks grades it later.
+        """
+        try:
+            with transaction.atomic():
+                self._upsert(args, kwargs, grade)
+        except IntegrityError:
+            if self.pk is not None:
+                raise
+            # A concurrent first answer won the insert; upsert over it instead
+            with transaction.atomic():
+                self._upsert(args, kwargs, grade)
+
+    def _upsert(self, args, kwargs, grade):
+        previous = self._lock_previous()
+        if previous is None:
+            self.attempts = 0
+            was_correct = False
         else:
-            if self.selected_option and self.selected_option.is_correct:
-                is_correct = True
+            kwargs.pop("force_insert", None)
+            self.pk = previous.pk
+            self._state.adding = False
+            self.created_at = previous.created_at
+            self.attempts = previous.attempts
+            was_correct = previous.is_correct
+            if previous.graded_at is not None:
+                StudentAnswerAttempt.archive([previous])
+        first_answer = self.attempts == 0
+
+        if not grade:
+            # Keep the last graded result until the actor grades the new content
+            self.is_correct = was_correct
+            self.graded_at = None
+            super().save(*args, **kwargs)
+            return
+
+        self.is_correct = self.grade()
+        self.graded_at = now()
+        self.attempts += 1
+        super().save(*args, **kwargs)
+        self._apply_awards(was_correct, first_answer)
 
-        if is_correct:
-            self._update_student_points(self.question.points)
+    def _lock_previous(self):
+        if self.pk is not None:
+            answers = StudentAnswer.objects.filter(pk=self.pk)
+        else:
+            answers = StudentAnswer.objects.filter(student_id=self.student_id, question_id=self.question_id)
+        return answers.select_for_update().first()
+
+    @classmethod
+    def grade_pending(cls, answer_id):
+        """
+        Grades an answer stored with ``save(grade=False)``. Claiming the answer
+        by setting graded_at makes this idempotent: a redelivered message finds
+        nothing to claim, and a failure rolls the claim back for the retry.
+        """
+        with transaction.atomic():
+            claimed = cls.objects.filter(pk=answer_id, graded_at__isnull=True).update(graded_at=now())
+            if not claimed:
+                return False
+            answer = cls.objects.select_related("question", "student").get(pk=answer_id)
+            was_correct = answer.is_correct
+            first_answer = answer.attempts == 0
+            answer.is_correct = answer.grade()
+            answer.attempts += 1
+            cls.objects.filter(pk=answer_id).update(is_correct=answer.is_correct, attempts=F("attempts") + 1)
+            answer._apply_awards(was_correct, first_answer)
+        return True
+
+    def _apply_awards(self, was_correct, first_answer):
+        correct_delta = int(self.is_correct) - int(was_correct)
+        if correct_delta:
+            self._update_student_points(correct_delta * self.question.points)
+        self._check_and_award_medals(answered=int(first_answer), correct=correct_delta)
+
+    def grade(self):
+        """
+        Returns whether this answer is correct. Uses the cached answer key of
+        the question, so grading normally costs no queries.
+        """
+        return grade_answer(get_answer_key(self.question), self.selected_option_id, self.typed_answer)
 
-        self.is_correct = is_correct
-        super().save(*args, **kwargs)
-        self._check_and_award_medals()
-    
     def _update_student_points(self, points):
-        # Get or create  the student's profile
-        student_profile, created = StudentProfile.objects.get_or_create(student=self.student)
-        # Add the question's points to the student's points
-        student_profile.points += points
-        student_profile.save()
+        # Append to the ledger; the profile total is bumped in the same statement-level update
+        PointsLedger.record(self.student, points=points, reason=LedgerReason.ANSWER, answer=self)
         
-    def _check_and_award_medals(self):
+    def _check_and_award_medals(self, answered, correct):
+        if not answered and not correct:
+            return
         # Get the games associated with the question
-        games = self.question.games.all()
-        for game in games:
-            # Get all questions in the game
-            total_questions = game.questions.count()
-
-            # Get the number of answers the student has submitted for this game
-            answered_questions = StudentAnswer.objects.filter(
+        for game_id in self.question.games.values_list("id", flat=True):
+            # Bump the student's counters for this game; completion is a single-row read
+            progress, completed = StudentGameProgress.record(
+                self.student, game_id, answered=answered, correct=correct
+            )
+
+            # Calculate the percentage score
+            percentage_score = progress.percentage_score
+
+            if not completed:
+                if correct and progress.answered_questions >= progress.total_questions:
+                    # A changed answer on an already finished game moves its score; saved through the
+                    # model so the leaderboard, rollups and version counters follow
+                    for played_game in PlayedGame.objects.filter(student=self.student, game_id=game_id, completed=True):
+                        played_game.score = percentage_score
+                        played_game.save(update_fields=["score"])
+                continue
+
+            # Check if the student has achieved a medal
+            if percentage_score >= 80:
+                # Award a medal to the student
+                PointsLedger.record(self.student, medals=1, reason=LedgerReason.GAME, game_id=game_id)
+
+            # Create or update the PlayedGame record
+            played_game, created = PlayedGame.objects.get_or_create(
                 student=self.student,
-                question__in=game.questions.all()
-            ).count()
-
-            # Only proceed if the student has answered all questions in the game
-            if answered_questions == total_questions:
-                # Get the number of correct answers given by the student for this game
-                correct_answers = StudentAnswer.objects.filter(
-                    student=self.student,
-                    question__in=game.questions.all(),
-                    is_correct=True
-                ).count()
-
-                # Calculate the percentage score
-                percentage_score = (correct_answers / total_questions) * 100
-                
-                # Check if the student has achieved a medal
-                if percentage_score >= 80:
-                    # Award a medal to the student
-                    student_profile, created = StudentProfile.objects.get_or_create(student=self.student)
-                    student_profile.medals += 1
-                    student_profile.save()    
-                
-                # Create or update the PlayedGame record
-                played_game, created = PlayedGame.objects.get_or_create(
-                    student=self.student,
-                    game=game,
-                    defaults={
-                        "score": percentage_score,
-                        "completed": True,
-                        "played_at": now()
-                    }
-                )
-                if not created:
-                    # Update the existing PlayedGame record if it already exists
-                    played_game.score = percentage_score
-                    played_game.completed = True
-                    played_game.played_at = now()
-                    played_game.save()
+                game_id=game_id,
+                defaults={
+                    "score": percentage_score,
+                    "completed": True,
+                    "played_at": now()
+                }
+            )
+            if not created:
+                # Update the existing PlayedGame record if it already exists
+                played_game.score = percentage_score
+                played_game.completed = True
+                played_game.played_at = now()
+                played_game.save()
+
+
+class StudentAnswerAttempt(models.Model):
+    """
+    Compact history of answers superseded by a newer StudentAnswer. Nothing
+    reads it on the hot path, so prune_answer_attempts can trim it freely.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="+")
+    selected_option = models.ForeignKey(Option, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    typed_answer = models.TextField(null=True, blank=True)
+    is_correct = models.BooleanField(default=False)
+    answered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["student", "question", "answered_at"])]
+
+    def __str__(self):
+        return f"{self.student} - question {self.question_id} ({'correct' if self.is_correct else 'wrong'})"
+
+    @classmethod
+    def archive(cls, answers):
+        return cls.objects.bulk_create([
+            cls(
+                student_id=answer.student_id,
+                question_id=answer.question_id,
+                selected_option_id=answer.selected_option_id,
+                typed_answer=answer.typed_answer,
+                is_correct=answer.is_correct,
+                answered_at=answer.graded_at,
+            )
+            for answer in answers
+        ])
 
 
 class Certificate(BaseModel):
@@ -193,6 +280,11 @@ class KnowledgeTrail(BaseModel):
     target_students = models.ManyToManyField(User, related_name="targeted_knowledge_trails", blank=True,
                                            help_text="Specific students who can see this knowledge trail when not public")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_public", "-recommended", "-created_at"], name="knowledge_trail_candidates_idx"),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.assigned_by} - {self.title}"
     
@@ -202,6 +294,17 @@ class Badge(BaseModel):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="badges")
     description = models.TextField()
     image = models.ImageField(upload_to='badges/')
+    position = models.PositiveSmallIntegerField(
+        null=True, blank=True, help_text="Leaderboard position this badge marks; empty for other badges."
+    )
+    scope = models.CharField(
+        max_length=20, choices=LeaderboardScope.choices, blank=True, help_text="Empty for the global leaderboard."
+    )
+    scope_id = models.PositiveIntegerField(null=True, blank=True)
+    window = models.CharField(max_length=20, choices=LeaderboardWindow.choices, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["scope", "scope_id", "window", "position"], name="badge_board_position_idx")]
     
     def __str__(self):
         return self.name
@@ -221,6 +324,7 @@ class Game(BaseModel):
     reward_points = models.PositiveIntegerField(default=10)
     badges_awarded = models.CharField(max_length=255, blank=True, help_text="Comma-separated badge names if any")
     questions = models.ManyToManyField('Question', related_name='games', blank=True)
+    subject = models.ForeignKey(Subject, on_delete=models.SET_NULL, null=True, blank=True, related_name="games")
     played_game = models.BooleanField(default=False)
     thumbnail = models.ImageField(upload_to="game_thumbnails/", null=True, blank=True)
     
@@ -244,6 +348,266 @@ class PlayedGame(BaseModel):
         return f"{self.student} played {self.game} ({self.score} pts)"
 
 
+class StudentGameProgress(BaseModel):
+    """
+    Running answer counters for a student on a game, maintained with F()
+    updates as answers are saved so completion checks never recount answers.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="game_progress")
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="student_progress")
+    answered_questions = models.PositiveIntegerField(default=0)
+    correct_answers = models.PositiveIntegerField(default=0)
+    total_questions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('student', 'game')
+
+    def __str__(self):
+        return f"{self.student} - {self.game} ({self.answered_questions}/{self.total_questions})"
+
+    @property
+    def percentage_score(self):
+        if not self.total_questions:
+            return 0
+        return (self.correct_answers / self.total_questions) * 100
+
+    @classmethod
+    def record(cls, student, game_id, answered, correct):
+        """
+        Adds already-saved answers to the student's counters for a game.
+        Returns the refreshed progress row and whether these answers are the
+        ones that took the student to the game's question count.
+        """
+        game_questions = Question.objects.filter(games__id=game_id)
+        with transaction.atomic():
+            progress, created = cls.objects.get_or_create(
+                student=student,
+                game_id=game_id,
+                # First answer for this game: seed the counters from existing answers
+                defaults={
+                    "total_questions": lambda: game_questions.count(),
+                    "answered_questions": lambda: StudentAnswer.objects.filter(
+                        student=student, question__in=game_questions, graded_at__isnull=False
+                    ).count(),
+                    "correct_answers": lambda: StudentAnswer.objects.filter(
+                        student=student, question__in=game_questions, graded_at__isnull=False, is_correct=True
+                    ).count(),
+                },
+            )
+            if not created:
+                cls.objects.filter(pk=progress.pk).update(
+                    answered_questions=F("answered_questions") + answered,
+                    correct_answers=F("correct_answers") + correct,
+                )
+                progress.refresh_from_db(fields=["answered_questions", "correct_answers", "total_questions"])
+
+        previously_answered = progress.answered_questions - answered
+        completed = previously_answered < progress.total_questions <= progress.answered_questions
+        return progress, completed
+
+
+class PointsLedger(models.Model):
+    """
+    Append-only record of every points/medals change. StudentProfile.points
+    and StudentProfile.medals are the materialized sums of these rows.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="points_ledger")
+    points_delta = models.IntegerField(default=0)
+    medals_delta = models.IntegerField(default=0)
+    reason = models.CharField(max_length=50, choices=LedgerReason.choices)
+    answer = models.ForeignKey(StudentAnswer, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    game = models.ForeignKey(Game, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["student", "created_at"])]
+
+    def __str__(self):
+        return f"{self.student} {self.points_delta:+} pts {self.medals_delta:+} medals ({self.reason})"
+
+    @classmethod
+    def record(cls, student, points=0, medals=0, reason=LedgerReason.ADJUSTMENT, answer=None, game_id=None):
+        """
+        Appends a ledger entry and applies it to the student's profile with a
+        single F() update, so concurrent awards never overwrite each other.
+        """
+        if not points and not medals:
+            return None
+        with transaction.atomic():
+            entry = cls.objects.create(
+                student=student,
+                points_delta=points,
+                medals_delta=medals,
+                reason=reason,
+                answer=answer,
+                game_id=game_id,
+            )
+            profiles = StudentProfile.objects.filter(student=student)
+            changes = {"points": F("points") + points, "medals": F("medals") + medals}
+            if not profiles.update(**changes):
+                StudentProfile.objects.get_or_create(student=student)
+                profiles.update(**changes)
+        return entry
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Materialized leaderboard row: a student's total PlayedGame score, kept in
+    step with PlayedGame by learning.leaderboard.refresh_students.
+    """
+    student = models.OneToOneField(User, on_delete=models.CASCADE, related_name="leaderboard_entry")
+    total_score = models.PositiveIntegerField(default=0)
+    games_played = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-total_score", "-last_activity", "student"], name="leaderboard_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.student} ({self.total_score} pts)"
+
+
+class LeaderboardRollup(models.Model):
+    """
+    Precomputed leaderboard totals for one cell: a scope (institution, subject
+    or game), a window (all time, calendar week or month) and a student.
+    Rows are refreshed per student by learning.rollups as PlayedGame changes.
+    """
+    scope = models.CharField(max_length=20, choices=LeaderboardScope.choices)
+    scope_id = models.PositiveIntegerField()
+    window = models.CharField(max_length=20, choices=LeaderboardWindow.choices)
+    period_start = models.DateField()
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    total_score = models.PositiveIntegerField(default=0)
+    games_played = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "scope_id", "window", "period_start", "student"], name="unique_leaderboard_rollup_cell"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["scope", "scope_id", "window", "period_start", "-total_score", "-last_activity", "student"],
+                name="leaderboard_rollup_order_idx",
+            ),
+            models.Index(fields=["student", "scope", "scope_id"], name="leaderboard_rollup_student_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.student} {self.scope}:{self.scope_id} {self.window} {self.period_start} ({self.total_score} pts)"
+
+
+class ActivityEvent(models.Model):
+    """
+    Append-only student timeline: one row per game play, answer submission,
+    knowledge trail view or certificate. ``object_id`` points at the game,
+    question, trail or certificate named by ``kind``. Written by
+    learning.activity and read newest first on activity_timeline_idx.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="activity_events")
+    kind = models.CharField(max_length=30, choices=ActivityKind.choices)
+    object_id = models.PositiveIntegerField()
+    occurred_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [models.Index(fields=["student", "-occurred_at", "-id"], name="activity_timeline_idx")]
+
+    def __str__(self):
+        return f"{self.student} {self.kind} {self.object_id} ({self.occurred_at})"
+
+
+class EntityCounter(models.Model):
+    """
+    Materialized row count for the statistics endpoints, e.g. "students".
+    Kept in step by signals through learning.counters.apply and recounted by
+    the reconcile_counters command.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=now)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class StatisticsSnapshot(models.Model):
+    """
+    Point-in-time copy of every EntityCounter, written on a schedule by the
+    snapshot_statistics command. Statistics "differences" compare the live
+    counters against the latest snapshot taken before the requested window.
+    """
+    taken_at = models.DateTimeField(default=now, db_index=True)
+    counts = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Statistics at {self.taken_at}"
+
+
+class StudentStatsRollup(models.Model):
+    """
+    A student's home-screen statistics in one row, refreshed by
+    learning.student_stats as games, certificates and points change. The
+    ``baseline_*`` columns hold the values of the latest StudentStatsSnapshot,
+    so the deltas need no second read.
+    """
+    student = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="stats_rollup")
+    points = models.IntegerField(default=0)
+    medals = models.IntegerField(default=0)
+    played_games = models.PositiveIntegerField(default=0)
+    certificates = models.PositiveIntegerField(default=0)
+    baseline_points = models.IntegerField(default=0)
+    baseline_medals = models.IntegerField(default=0)
+    baseline_played_games = models.PositiveIntegerField(default=0)
+    baseline_certificates = models.PositiveIntegerField(default=0)
+    baseline_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=now)
+
+    def __str__(self):
+        return f"{self.student} stats ({self.points} pts, {self.played_games} games)"
+
+
+class StudentStatsSnapshot(models.Model):
+    """Periodic copy of a StudentStatsRollup, written by the snapshot_student_stats command."""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    taken_at = models.DateTimeField(default=now)
+    points = models.IntegerField(default=0)
+    medals = models.IntegerField(default=0)
+    played_games = models.PositiveIntegerField(default=0)
+    certificates = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["student", "taken_at"])]
+
+    def __str__(self):
+        return f"{self.student} stats at {self.taken_at}"
+
+
+class QuestionStats(models.Model):
+    """
+    Item analysis of a question over the students' current answers, written
+    by learning.item_analysis. ``options`` holds one entry per Option with
+    how often it was picked and how picking it correlates with ability.
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    answers = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    p_value = models.FloatField(help_text="Share of answers that are correct; low means hard.")
+    discrimination = models.FloatField(
+        null=True, blank=True,
+        help_text="Point-biserial correlation between answering correctly and the rest of the student's score.",
+    )
+    options = models.JSONField(default=list)
+    computed_at = models.DateTimeField(default=now)
+
+    def __str__(self):
+        return f"Question {self.question_id}: p={self.p_value:.2f}"
+
+
 class UserAttendance(BaseModel):
     student = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateField(auto_now_add=True)
@@ -270,38 +634,10 @@ class Statistics(models.Model):
 
 def award_top_students_badges():
     """
-    Awards Gold, Silver, and Bronze badges to the top 3 students based on their total points.
-    Ensures each student only has one of these badges at a time.
+    Awards Gold, Silver, and Bronze badges to the top 3 students of the global leaderboard.
+    Only positions whose holder changed are touched; see learning.badges.
     """
-    
-    # Get top 3 students by points
-    top_students = StudentProfile.objects.order_by('-points')[:3]
-    badge_names = ["Gold", "Silver", "Bronze"]
-    badge_descriptions = [
-        "Awarded to the student with the highest score.",
-        "Awarded to the student with the second highest score.",
-        "Awarded to the student with the third highest score."
-    ]
-    badge_images = [
-        "badges/gold.png",  # You should have these images in your media folder
-        "badges/silver.png",
-        "badges/bronze.png"
-    ]
-    
-    # Remove these badges from all students before re-awarding
-    Badge.objects.filter(name__in=badge_names).delete()
-    
-    for idx, student_profile in enumerate(top_students):
-        badge, _ = Badge.objects.get_or_create(
-            name=badge_names[idx],
-            student=student_profile.student,
-            defaults={
-                "description": badge_descriptions[idx],
-                "image": badge_images[idx]
-            }
-        )
-        # Optionally, create an Achievement record
-        Achievement.objects.get_or_create(
-            student=student_profile.student,
-            badge=badge
-        )
\ No newline at end of file
+    # Imported here because learning.badges depends on this module
+    from learning.badges import reconcile_rank_badges
+
+    return reconcile_rank_badges()
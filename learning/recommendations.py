@@ -0,0 +1,100 @@
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import KnowledgeTrail
+
+CACHE_PREFIX = "recommendations"
+CACHE_TIMEOUT = getattr(settings, "RECOMMENDATION_CACHE_TIMEOUT", 60 * 60)
+CANDIDATE_LIMIT = 100
+SLOTS = 3
+
+PUBLIC = "public"
+
+
+def _cache_key(cohort):
+    return f"{CACHE_PREFIX}:{cohort}"
+
+
+def student_cohort(student_id):
+    return f"student:{student_id}"
+
+
+def _split(rows):
+    """Turns ``(trail_id, recommended)`` rows, newest first, into capped candidate lists."""
+    candidates = {"recommended": [], "other": []}
+    for trail_id, recommended in rows:
+        bucket = candidates["recommended" if recommended else "other"]
+        if len(bucket) < CANDIDATE_LIMIT:
+            bucket.append(trail_id)
+    return candidates
+
+
+def _compute(cohort):
+    if cohort == PUBLIC:
+        trails = KnowledgeTrail.objects.filter(is_public=True)
+    else:
+        student_id = int(cohort.split(":", 1)[1])
+        trails = KnowledgeTrail.objects.filter(is_public=False, target_students=student_id)
+    rows = trails.order_by("-recommended", "-created_at", "-id").values_list("id", "recommended")
+    # Recommended first, so both buckets fill from one capped read
+    return _split(rows[:CANDIDATE_LIMIT * 2])
+
+
+def get_candidates(student_id):
+    """
+    Candidate trail ids visible to the student: public trails plus private
+    ones that target them. Served from the cache; a cold cohort is rebuilt
+    with one capped, index-ordered read.
+    """
+    cohorts = [PUBLIC, student_cohort(student_id)]
+    cached = cache.get_many([_cache_key(cohort) for cohort in cohorts])
+    merged = {"recommended": [], "other": []}
+    for cohort in cohorts:
+        candidates = cached.get(_cache_key(cohort))
+        if candidates is None:
+            candidates = _compute(cohort)
+            cache.set(_cache_key(cohort), candidates, CACHE_TIMEOUT)
+        merged["recommended"] += candidates["recommended"]
+        merged["other"] += candidates["other"]
+    return merged
+
+
+def pick(student_id, slots=SLOTS):
+    """Randomly samples ``slots`` trail ids for the student, preferring recommended trails."""
+    candidates = get_candidates(student_id)
+    picked = random.sample(candidates["recommended"], min(slots, len(candidates["recommended"])))
+    if len(picked) < slots:
+        picked += random.sample(candidates["other"], min(slots - len(picked), len(candidates["other"])))
+    return picked
+
+
+def invalidate(student_ids=(), public=False):
+    """Drops the given cohorts once the current transaction commits, so they are rebuilt from committed rows."""
+    keys = [_cache_key(student_cohort(student_id)) for student_id in student_ids]
+    if public:
+        keys.append(_cache_key(PUBLIC))
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def refresh_all():
+    """Recomputes the public cohort and every targeted student's cohort; returns how many were written."""
+    cohorts = {_cache_key(PUBLIC): _compute(PUBLIC)}
+
+    targets = KnowledgeTrail.target_students.through.objects.filter(knowledgetrail__is_public=False).order_by(
+        "-knowledgetrail__recommended", "-knowledgetrail__created_at", "-knowledgetrail_id"
+    )
+    rows = defaultdict(list)
+    for student_id, trail_id, recommended in targets.values_list(
+        "user_id", "knowledgetrail_id", "knowledgetrail__recommended"
+    ).iterator():
+        rows[student_id].append((trail_id, recommended))
+    for student_id, student_rows in rows.items():
+        cohorts[_cache_key(student_cohort(student_id))] = _split(student_rows)
+
+    cache.set_many(cohorts, CACHE_TIMEOUT)
+    return len(cohorts)
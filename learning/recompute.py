@@ -0,0 +1,186 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils.timezone import now
+
+from users.models import StudentProfile
+
+from . import leaderboard, rollups, student_stats, versions
+from .badges import reconcile_rank_badges
+from .choices import LedgerReason
+from .grading import MEDAL_THRESHOLD
+from .models import Game, PlayedGame, PointsLedger, StudentAnswer, StudentGameProgress
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def recompute_game_results(dry_run=False, batch_size=DEFAULT_BATCH_SIZE, reset_medals=False):
+    """
+    Rebuilds per-game progress counters and PlayedGame scores/completion from
+    StudentAnswer, ``batch_size`` students at a time: each chunk gets one
+    grouped query over its answers, is compared with its own progress and
+    PlayedGame rows, and only the rows that differ are written in bulk before
+    the next chunk is read. Returns a report of changes.
+
+    With ``reset_medals`` every student's medal count is also reset to one per
+    game finished at or above the threshold, discarding medals from any other
+    source, so it is opt-in.
+    """
+    totals = dict(Game.objects.annotate(total=Count("questions")).values_list("id", "total"))
+    report = {
+        "pairs": 0,
+        "progress_created": 0,
+        "progress_updated": 0,
+        "played_games_created": 0,
+        "played_games_updated": 0,
+        "medal_adjustments": 0,
+    }
+
+    last_id = 0
+    while True:
+        student_ids = list(
+            User.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not student_ids:
+            break
+        last_id = student_ids[-1]
+
+        results = _results(student_ids, totals)
+        report["pairs"] += len(results)
+        with transaction.atomic():
+            _sync_progress(student_ids, results, report, dry_run, batch_size)
+            _sync_played_games(student_ids, results, report, dry_run, batch_size)
+            if reset_medals:
+                _sync_medals(student_ids, results, report, dry_run)
+
+    if not dry_run and (report["played_games_created"] or report["played_games_updated"]):
+        reconcile_rank_badges()
+    return report
+
+
+def _results(student_ids, totals):
+    """One grouped query: answered/correct per (student, game) for ``student_ids``."""
+    results = {}
+    for row in (
+        StudentAnswer.objects.filter(
+            student_id__in=student_ids, graded_at__isnull=False, question__games__isnull=False
+        )
+        .values("student_id", game_id=F("question__games"))
+        .annotate(answered=Count("id"), correct=Count("id", filter=Q(is_correct=True)))
+        .order_by()
+    ):
+        total = totals.get(row["game_id"], 0)
+        results[(row["student_id"], row["game_id"])] = {
+            "answered": row["answered"],
+            "correct": row["correct"],
+            "total": total,
+            "score": int((row["correct"] / total) * 100) if total else 0,
+            "completed": total > 0 and row["answered"] >= total,
+        }
+    return results
+
+
+def _sync_progress(student_ids, results, report, dry_run, batch_size):
+    existing = {
+        (progress.student_id, progress.game_id): progress
+        for progress in StudentGameProgress.objects.filter(student_id__in=student_ids)
+    }
+    to_create, to_update = [], []
+    for key, result in results.items():
+        progress = existing.get(key)
+        if progress is None:
+            to_create.append(StudentGameProgress(
+                student_id=key[0],
+                game_id=key[1],
+                answered_questions=result["answered"],
+                correct_answers=result["correct"],
+                total_questions=result["total"],
+            ))
+        elif (progress.answered_questions, progress.correct_answers, progress.total_questions) != (
+            result["answered"], result["correct"], result["total"]
+        ):
+            progress.answered_questions = result["answered"]
+            progress.correct_answers = result["correct"]
+            progress.total_questions = result["total"]
+            to_update.append(progress)
+
+    report["progress_created"] += len(to_create)
+    report["progress_updated"] += len(to_update)
+    if not dry_run:
+        StudentGameProgress.objects.bulk_create(to_create, batch_size=batch_size)
+        StudentGameProgress.objects.bulk_update(
+            to_update, ["answered_questions", "correct_answers", "total_questions"], batch_size=batch_size
+        )
+
+
+def _sync_played_games(student_ids, results, report, dry_run, batch_size):
+    played_games = defaultdict(list)
+    for played_game in PlayedGame.objects.filter(student_id__in=student_ids).only(
+        "id", "student_id", "game_id", "score", "completed", "played_at"
+    ):
+        played_games[(played_game.student_id, played_game.game_id)].append(played_game)
+
+    to_create, to_update = [], []
+    for key, result in results.items():
+        rows = played_games.get(key)
+        if not rows:
+            if result["completed"]:
+                to_create.append(PlayedGame(
+                    student_id=key[0], game_id=key[1], score=result["score"], completed=True, played_at=now()
+                ))
+            continue
+        for played_game in rows:
+            if (played_game.score, played_game.completed) != (result["score"], result["completed"]):
+                played_game.score = result["score"]
+                played_game.completed = result["completed"]
+                to_update.append(played_game)
+
+    report["played_games_created"] += len(to_create)
+    report["played_games_updated"] += len(to_update)
+    if not dry_run:
+        PlayedGame.objects.bulk_create(to_create, batch_size=batch_size)
+        PlayedGame.objects.bulk_update(to_update, ["score", "completed"], batch_size=batch_size)
+        # bulk writes skip the PlayedGame signals
+        changed_ids = {played_game.student_id for played_game in to_create + to_update}
+        leaderboard.refresh_students(changed_ids)
+        rollups.refresh(to_create + to_update)
+        student_stats.schedule_refresh(changed_ids)
+
+
+def _sync_medals(student_ids, results, report, dry_run):
+    # One medal per game finished at or above the threshold
+    expected = defaultdict(int)
+    for (student_id, game_id), result in results.items():
+        if result["completed"] and result["score"] >= MEDAL_THRESHOLD:
+            expected[student_id] += 1
+
+    deltas = {}
+    for student_id, medals in StudentProfile.objects.filter(student_id__in=student_ids).values_list(
+        "student_id", "medals"
+    ):
+        delta = expected.get(student_id, 0) - medals
+        if delta:
+            deltas[student_id] = delta
+
+    report["medal_adjustments"] += len(deltas)
+    if dry_run or not deltas:
+        return
+
+    # Corrections go through the ledger so reconcile_points agrees with the profiles
+    PointsLedger.objects.bulk_create(
+        [
+            PointsLedger(student_id=student_id, medals_delta=delta, reason=LedgerReason.ADJUSTMENT)
+            for student_id, delta in deltas.items()
+        ]
+    )
+    by_delta = defaultdict(list)
+    for student_id, delta in deltas.items():
+        by_delta[delta].append(student_id)
+    for delta, student_ids in by_delta.items():
+        StudentProfile.objects.filter(student_id__in=student_ids).update(medals=F("medals") + delta)
+    versions.bump_students(deltas)
+    student_stats.schedule_refresh(deltas)
@@ -0,0 +1,142 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from users.models import StudentProfile
+
+from . import leaderboard, rollups, student_stats, versions
+from .answer_keys import build_answer_key, grade_answer, invalidate_answer_key
+from .badges import reconcile_rank_badges
+from .choices import LedgerReason
+from .models import Game, PlayedGame, PointsLedger, Question, StudentAnswer, StudentGameProgress
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def regrade_questions(question_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Re-grades every graded answer to ``question_ids`` against the current
+    answer keys. Answers are locked and read in id-ordered chunks as plain
+    tuples and only rows whose correctness flips are updated, with two
+    UPDATEs per chunk. Points move by the difference through the ledger, progress
+    counters follow, and the affected PlayedGame scores are refreshed at
+    the end. Re-running is safe: already regraded rows no longer flip.
+    """
+    questions = Question.objects.filter(pk__in=list(question_ids)).prefetch_related("options")
+    answer_keys = {}
+    question_points = {}
+    for question in questions:
+        invalidate_answer_key(question.id)
+        answer_keys[question.id] = build_answer_key(question)
+        question_points[question.id] = question.points
+
+    question_games = defaultdict(list)
+    for question_id, game_id in Game.questions.through.objects.filter(
+        question_id__in=answer_keys
+    ).values_list("question_id", "game_id"):
+        question_games[question_id].append(game_id)
+
+    report = {"questions": len(answer_keys), "answers": 0, "now_correct": 0, "now_incorrect": 0, "students": 0}
+    touched_games = defaultdict(set)
+    touched_students = set()
+
+    answers = StudentAnswer.objects.filter(question_id__in=answer_keys, graded_at__isnull=False).order_by("id")
+    last_id = 0
+    while True:
+        chunk_ids = list(answers.filter(id__gt=last_id).values_list("id", flat=True)[:chunk_size])
+        if not chunk_ids:
+            break
+        last_id = chunk_ids[-1]
+
+        with transaction.atomic():
+            # Flips are computed from locked rows, so an overlapping regrade or resubmission
+            # waits here and then sees the already flipped values instead of applying them twice
+            chunk = list(
+                answers.filter(id__in=chunk_ids).select_for_update().values_list(
+                    "id", "student_id", "question_id", "selected_option_id", "typed_answer", "is_correct"
+                )
+            )
+            report["answers"] += len(chunk)
+
+            now_correct, now_incorrect = [], []
+            points_deltas = defaultdict(int)
+            progress_deltas = defaultdict(int)
+            for answer_id, student_id, question_id, selected_option_id, typed_answer, was_correct in chunk:
+                is_correct = grade_answer(answer_keys[question_id], selected_option_id, typed_answer)
+                if is_correct == was_correct:
+                    continue
+                sign = 1 if is_correct else -1
+                (now_correct if is_correct else now_incorrect).append(answer_id)
+                points_deltas[student_id] += sign * question_points[question_id]
+                for game_id in question_games[question_id]:
+                    progress_deltas[(student_id, game_id)] += sign
+                    touched_games[game_id].add(student_id)
+                touched_students.add(student_id)
+
+            if now_correct or now_incorrect:
+                StudentAnswer.objects.filter(id__in=now_correct, is_correct=False).update(is_correct=True)
+                StudentAnswer.objects.filter(id__in=now_incorrect, is_correct=True).update(is_correct=False)
+                _apply_points(points_deltas)
+                _apply_progress(progress_deltas)
+        report["now_correct"] += len(now_correct)
+        report["now_incorrect"] += len(now_incorrect)
+
+    for game_id, student_ids in touched_games.items():
+        refresh_played_game_scores(game_id, student_ids)
+    if touched_games:
+        reconcile_rank_badges()
+
+    report["students"] = len(touched_students)
+    return report
+
+
+def _apply_points(points_deltas):
+    PointsLedger.objects.bulk_create(
+        [
+            PointsLedger(student_id=student_id, points_delta=delta, reason=LedgerReason.REGRADE)
+            for student_id, delta in points_deltas.items()
+            if delta
+        ]
+    )
+    # Students sharing the same delta are moved together in one statement
+    for delta, student_ids in _group_by_delta(points_deltas).items():
+        StudentProfile.objects.filter(student_id__in=student_ids).update(points=F("points") + delta)
+    # The bulk writes above skip the signals that keep the stats rollups fresh
+    versions.bump_students(points_deltas)
+    student_stats.schedule_refresh(points_deltas)
+
+
+def _apply_progress(progress_deltas):
+    by_game = defaultdict(dict)
+    for (student_id, game_id), delta in progress_deltas.items():
+        by_game[game_id][student_id] = delta
+    for game_id, deltas in by_game.items():
+        for delta, student_ids in _group_by_delta(deltas).items():
+            StudentGameProgress.objects.filter(game_id=game_id, student_id__in=student_ids).update(
+                correct_answers=F("correct_answers") + delta
+            )
+
+
+def _group_by_delta(deltas):
+    grouped = defaultdict(list)
+    for key, delta in deltas.items():
+        if delta:
+            grouped[delta].append(key)
+    return grouped
+
+
+def refresh_played_game_scores(game_id, student_ids):
+    """Rewrites completed PlayedGame scores for a game from the students' progress counters."""
+    progress_rows = StudentGameProgress.objects.filter(
+        game_id=game_id, student_id__in=student_ids, total_questions__gt=0
+    ).values_list("student_id", "correct_answers", "total_questions")
+    scores = defaultdict(list)
+    for student_id, correct_answers, total_questions in progress_rows:
+        scores[int((correct_answers / total_questions) * 100)].append(student_id)
+    for score, ids in scores.items():
+        PlayedGame.objects.filter(game_id=game_id, student_id__in=ids, completed=True).update(score=score)
+    leaderboard.refresh_students(student_ids)
+    rollups.refresh(
+        PlayedGame.objects.filter(game_id=game_id, student_id__in=student_ids).only("student_id", "game_id", "played_at")
+    )
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import localdate, now
+
+from .choices import LeaderboardScope, LeaderboardWindow
+from .models import Game, LeaderboardRollup, PlayedGame
+
+User = get_user_model()
+
+# period_start of the all-time window, which has a single bucket
+ALL_TIME_START = date(1970, 1, 1)
+REBUILD_BATCH_SIZE = 5000
+
+ROW_FIELDS = ("student_id", "game_id", "game__subject_id", "student__institution_id", "score", "played_at")
+UPDATE_FIELDS = ["total_score", "games_played", "last_activity"]
+CELL_FIELDS = ["scope", "scope_id", "window", "period_start", "student"]
+
+
+def period_start(window, moment):
+    """First day of the bucket that ``moment`` falls in: weeks start on Monday, months on the 1st."""
+    if window == LeaderboardWindow.ALL_TIME:
+        return ALL_TIME_START
+    day = localdate(moment)
+    if window == LeaderboardWindow.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def board(scope, scope_id, window=LeaderboardWindow.ALL_TIME, moment=None):
+    """Rollup rows of one scoped board for the window containing ``moment`` (default: now)."""
+    return LeaderboardRollup.objects.filter(
+        scope=scope, scope_id=scope_id, window=window, period_start=period_start(window, moment or now())
+    )
+
+
+def _cells(game_id, subject_id, institution_id, played_at):
+    scopes = [(LeaderboardScope.GAME, game_id)]
+    if subject_id:
+        scopes.append((LeaderboardScope.SUBJECT, subject_id))
+    if institution_id:
+        scopes.append((LeaderboardScope.INSTITUTION, institution_id))
+    for scope, scope_id in scopes:
+        for window in LeaderboardWindow.values:
+            yield scope, scope_id, window, period_start(window, played_at)
+
+
+def _accumulate(totals, row):
+    for cell in _cells(row["game_id"], row["game__subject_id"], row["student__institution_id"], row["played_at"]):
+        total = totals[(row["student_id"], *cell)]
+        total["total_score"] += row["score"]
+        total["games_played"] += 1
+        if total["last_activity"] is None or row["played_at"] > total["last_activity"]:
+            total["last_activity"] = row["played_at"]
+
+
+def _new_totals():
+    return defaultdict(lambda: {"total_score": 0, "games_played": 0, "last_activity": None})
+
+
+def _rollup(key, total):
+    student_id, scope, scope_id, window, start = key
+    return LeaderboardRollup(
+        scope=scope, scope_id=scope_id, window=window, period_start=start, student_id=student_id, **total
+    )
+
+
+def refresh(played_games):
+    """
+    Refreshes the rollup cells touched by ``played_games`` (saved or just
+    deleted PlayedGame instances). Only those cells are recomputed, from the
+    owning students' PlayedGame rows; cells left empty are removed.
+    """
+    played_games = list(played_games)
+    if not played_games:
+        return
+    student_ids = {played_game.student_id for played_game in played_games}
+    subjects = dict(
+        Game.objects.filter(pk__in={played_game.game_id for played_game in played_games}).values_list("id", "subject_id")
+    )
+    institutions = dict(User.objects.filter(pk__in=student_ids).values_list("id", "institution_id"))
+
+    affected = set()
+    for played_game in played_games:
+        for cell in _cells(
+            played_game.game_id,
+            subjects.get(played_game.game_id),
+            institutions.get(played_game.student_id),
+            played_game.played_at or now(),
+        ):
+            affected.add((played_game.student_id, *cell))
+
+    totals = _new_totals()
+    for row in PlayedGame.objects.filter(student_id__in=student_ids).values(*ROW_FIELDS):
+        _accumulate(totals, row)
+
+    rollups = [_rollup(key, totals[key]) for key in affected if key in totals]
+    emptied = [key for key in affected if key not in totals]
+    with transaction.atomic():
+        LeaderboardRollup.objects.bulk_create(
+            rollups, update_conflicts=True, unique_fields=CELL_FIELDS, update_fields=UPDATE_FIELDS
+        )
+        if emptied:
+            cells = Q()
+            for student_id, scope, scope_id, window, start in emptied:
+                cells |= Q(student_id=student_id, scope=scope, scope_id=scope_id, window=window, period_start=start)
+            LeaderboardRollup.objects.filter(cells).delete()
+
+
+def rebuild(batch_size=REBUILD_BATCH_SIZE):
+    """Recomputes every rollup row from PlayedGame, a batch of students at a time."""
+    rows = PlayedGame.objects.order_by("student_id").values(*ROW_FIELDS)
+    created = 0
+    with transaction.atomic():
+        LeaderboardRollup.objects.all().delete()
+        totals = _new_totals()
+        current_student = None
+        for row in rows.iterator(chunk_size=batch_size):
+            # Flush between students so a student's cells are never split across batches
+            if row["student_id"] != current_student and len(totals) >= batch_size:
+                LeaderboardRollup.objects.bulk_create([_rollup(key, total) for key, total in totals.items()])
+                created += len(totals)
+                totals = _new_totals()
+            current_student = row["student_id"]
+            _accumulate(totals, row)
+        LeaderboardRollup.objects.bulk_create([_rollup(key, total) for key, total in totals.items()])
+        created += len(totals)
+    return created
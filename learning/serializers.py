@@ -1,15 +1,22 @@
+import re
+from datetime import timedelta
+
 from rest_framework import serializers
 
-from learning.choices import QuestionType
+from learning.choices import LeaderboardScope, LeaderboardWindow, QuestionType
 from users.choices import UserType
 from users.models import StudentProfile
+from . import activity, item_analysis
+from .leaderboard import MAX_PAGE_SIZE, PAGE_SIZE, get_leaderboard
 from .models import (
     Achievement,
+    ActivityEvent,
     Badge,
     Game,
     Institution,
     PlayedGame,
     Question,
+    QuestionStats,
     Option,
     StudentAnswer,
     Certificate,
@@ -17,13 +24,14 @@ from .models import (
     Subject,
     Topic,
     UserAttendance,
-    Module
+    Module,
+    StatisticsSnapshot
 )
 
-from django.db.models import Sum
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from datetime import timedelta
 
 User = get_user_model()
 
@@ -65,7 +73,7 @@ class GameSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Game
-        fields = ["id", "title", "badges_awarded", "questions"]
+        fields = ["id", "title", "subject", "badges_awarded", "questions"]
 
     def create(self, validated_data):
         user = self.context.get("request").user
@@ -301,31 +309,52 @@ class DashboardSerializer(serializers.ModelSerializer):
     attendance = serializers.SerializerMethodField()
     last_activity = serializers.SerializerMethodField()
 
+    ATTENDANCE_DAYS = 30
+
     class Meta:
         model = StudentProfile
-        fields = ['points', 'medals', 'level', 'activities_completed', 'leaderboard_rank', 'total_score', 'attendance', 'last_activity']
+        fields = ['points', 'medals', 'activities_completed', 'leaderboard_rank', 'total_score', 'attendance', 'last_activity']
+
+    @classmethod
+    def with_stats(cls, profiles):
+        """
+        Annotates ``profiles`` with everything this serializer reads, so
+        serializing any number of them is a single query.
+        """
+        start_date = timezone.now().date() - timedelta(days=cls.ATTENDANCE_DAYS)
+        present_days = (
+            UserAttendance.objects.filter(student_id=OuterRef("student_id"), login_time__date__gte=start_date)
+            .order_by()
+            .values("student_id")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return profiles.annotate(
+            total_score=Coalesce(F("student__leaderboard_entry__total_score"), 0),
+            last_activity=F("student__leaderboard_entry__last_activity"),
+            present_days=Coalesce(Subquery(present_days), 0),
+        )
 
     def get_leaderboard_rank(self, obj):
-        # Calculate rank based on total score
-        queryset = StudentProfile.objects.annotate(
-            total_score=Sum('student__playedgame__score')
-        ).order_by('-total_score')
-        rank = 1
-        for profile in queryset:
-            if profile.id == obj.id:
-                return rank
-            rank += 1
-        return None
+        # Views serializing several profiles pass ranks fetched in one batch
+        ranks = self.context.get("leaderboard_ranks")
+        if ranks is not None and obj.student_id in ranks:
+            return ranks[obj.student_id]
+        return get_leaderboard().rank(obj.student_id)
 
     def get_total_score(self, obj):
-        total_score = obj.student.playedgame_set.aggregate(total=Sum('score'))['total'] or 0
-        return total_score
+        if hasattr(obj, "total_score"):
+            return obj.total_score
+        return get_leaderboard().score(obj.student_id) or 0
 
     def get_attendance(self, obj):
         # Calculate attendance based on UserAttendance (example: percentage of present days)
         today = timezone.now().date()
-        start_date = today - timedelta(days=30) # Consider last 30 days
-        present_days = obj.student.userattendance_set.filter(login_time__date__gte=start_date).count()
+        start_date = today - timedelta(days=self.ATTENDANCE_DAYS)
+        if hasattr(obj, "present_days"):
+            present_days = obj.present_days
+        else:
+            present_days = obj.student.userattendance_set.filter(login_time__date__gte=start_date).count()
         total_days = (today - start_date).days + 1
         if total_days > 0:
             return f"{round((present_days / total_days) * 100)}%"
@@ -333,6 +362,8 @@ class DashboardSerializer(serializers.ModelSerializer):
 
     def get_last_activity(self, obj):
         # Get the last time the student interacted with a game
+        if hasattr(obj, "last_activity"):
+            return obj.last_activity
         last_played = obj.student.playedgame_set.order_by('-played_at').first()
         return last_played.played_at if last_played else None
     
@@ -365,6 +396,9 @@ class StudentAnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = StudentAnswer
         fields = "__all__"
+        read_only_fields = ["is_correct", "graded_at", "attempts"]
+        # Re-answering a question updates the existing row instead of failing the unique check
+        validators = []
 
     def create(self, validated_data):
         # Create the StudentAnswer instance
@@ -374,6 +408,71 @@ class StudentAnswerSerializer(serializers.ModelSerializer):
         return student_answer
 
 
+class GameAnswerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StudentAnswer
+        fields = ["question", "selected_option", "typed_answer"]
+
+
+class GameSubmissionSerializer(serializers.Serializer):
+    game = serializers.PrimaryKeyRelatedField(queryset=Game.objects.all())
+    answers = GameAnswerSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        game_question_ids = set(data["game"].questions.values_list("id", flat=True))
+        seen_question_ids = set()
+        for answer in data["answers"]:
+            question = answer["question"]
+            if question.id not in game_question_ids:
+                raise serializers.ValidationError(f"Question {question.id} does not belong to this game.")
+            if question.id in seen_question_ids:
+                raise serializers.ValidationError(f"Question {question.id} was answered more than once.")
+            seen_question_ids.add(question.id)
+
+            selected_option = answer.get("selected_option")
+            if selected_option and selected_option.question_id != question.id:
+                raise serializers.ValidationError(f"Option {selected_option.id} does not belong to question {question.id}.")
+        return data
+
+    def answer_rows(self):
+        # Plain ids, the shape learning.grading.submit_game_answers expects
+        return [
+            {
+                "question_id": answer["question"].id,
+                "selected_option_id": answer["selected_option"].id if answer.get("selected_option") else None,
+                "typed_answer": answer.get("typed_answer"),
+            }
+            for answer in self.validated_data["answers"]
+        ]
+
+
+class GameSessionAnswerSerializer(serializers.Serializer):
+    session = serializers.CharField()
+    question = serializers.IntegerField()
+    selected_option = serializers.IntegerField(required=False, allow_null=True)
+    typed_answer = serializers.CharField(required=False, allow_null=True, allow_blank=True, trim_whitespace=False)
+
+
+class LeaderboardPageQuerySerializer(serializers.Serializer):
+    page_size = serializers.IntegerField(default=PAGE_SIZE, min_value=1, max_value=MAX_PAGE_SIZE)
+    cursor = serializers.CharField(required=False)
+
+
+class ScopedLeaderboardQuerySerializer(LeaderboardPageQuerySerializer):
+    scope = serializers.ChoiceField(choices=LeaderboardScope.choices)
+    # Defaults to the caller's own institution for institution boards
+    scope_id = serializers.IntegerField(required=False, min_value=1)
+    window = serializers.ChoiceField(choices=LeaderboardWindow.choices, default=LeaderboardWindow.ALL_TIME)
+
+
+class AroundMeQuerySerializer(serializers.Serializer):
+    radius = serializers.IntegerField(default=5, min_value=0, max_value=MAX_PAGE_SIZE)
+    # Optional: rank within a scoped board instead of the global one
+    scope = serializers.ChoiceField(choices=LeaderboardScope.choices, required=False)
+    scope_id = serializers.IntegerField(required=False, min_value=1)
+    window = serializers.ChoiceField(choices=LeaderboardWindow.choices, default=LeaderboardWindow.ALL_TIME)
+
+
 class ModuleSerializer(serializers.ModelSerializer):
     knowledge_trails = KnowledgeTrailSerializer(many=True, read_only=True)
     assigned_by_name = serializers.CharField(source='assigned_by.first_name', read_only=True)
@@ -393,3 +492,51 @@ class ModuleSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Only teachers or admins can create modules.")
         validated_data['assigned_by'] = user
         return super().create(validated_data)
+
+
+class ActivityEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ActivityEvent
+        fields = ["id", "kind", "object_id", "occurred_at"]
+
+
+class ActivityTimelineQuerySerializer(serializers.Serializer):
+    page_size = serializers.IntegerField(default=activity.PAGE_SIZE, min_value=1, max_value=activity.MAX_PAGE_SIZE)
+    cursor = serializers.CharField(required=False)
+
+
+class StatisticsWindowField(serializers.CharField):
+    """A lookback such as ``24h``, ``7d`` or ``30d``, returned as a timedelta."""
+    default_error_messages = {"invalid": "Use a number of hours or days, e.g. 24h, 7d or 30d."}
+
+    def to_internal_value(self, data):
+        match = re.fullmatch(r"([1-9][0-9]{0,3})([hd])", super().to_internal_value(data))
+        if match is None:
+            self.fail("invalid")
+        amount, unit = int(match.group(1)), match.group(2)
+        return timedelta(hours=amount) if unit == "h" else timedelta(days=amount)
+
+
+class StatisticsQuerySerializer(serializers.Serializer):
+    window = StatisticsWindowField(default=timedelta(days=7))
+
+
+class StatisticsSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StatisticsSnapshot
+        fields = ["taken_at", "counts"]
+
+
+class QuestionStatsSerializer(serializers.ModelSerializer):
+    question_text = serializers.CharField(source="question.question_text", read_only=True)
+    flags = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuestionStats
+        fields = [
+            "question", "question_text", "answers", "correct", "p_value", "discrimination", "options", "flags",
+            "computed_at",
+        ]
+
+    def get_flags(self, obj):
+        return item_analysis.flags(obj)
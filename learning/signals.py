@@ -0,0 +1,174 @@
+# learning/signals.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from users.models import StudentProfile
+
+from . import activity, counters, leaderboard, recommendations, rollups, student_stats, versions
+from .answer_keys import invalidate_answer_key, question_version
+from .badges import RANK_BADGES, reconcile_rank_badges
+from .choices import ActivityKind
+from .models import (
+    Achievement, Badge, Certificate, Game, KnowledgeTrail, Option, PlayedGame, PointsLedger, Question, StudentGameProgress
+)
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_answer_key(sender, instance, **kwargs):
+    invalidate_answer_key(instance.id)
+
+
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+def bump_question_answer_key(sender, instance, **kwargs):
+    # Changing an option changes the answer key, so move the question's version stamp
+    stamp = now()
+    Question.objects.filter(pk=instance.question_id).update(updated_at=stamp)
+    if Option.question.is_cached(instance):
+        old_version = question_version(instance.question)
+        instance.question.updated_at = stamp
+        invalidate_answer_key(instance.question_id, old_version)
+    else:
+        invalidate_answer_key(instance.question_id)
+
+
+@receiver(m2m_changed, sender=Game.questions.through)
+def refresh_game_progress_totals(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        game_ids = [instance.pk]
+    elif pk_set:
+        game_ids = list(pk_set)
+    else:
+        # question.games.clear() does not report which games were touched
+        game_ids = list(StudentGameProgress.objects.values_list("game_id", flat=True).distinct())
+
+    totals = Game.objects.filter(pk__in=game_ids).annotate(total=Count("questions")).values_list("id", "total")
+    for game_id, total in totals:
+        StudentGameProgress.objects.filter(game_id=game_id).update(total_questions=total)
+
+
+@receiver(post_save, sender=PlayedGame)
+@receiver(post_delete, sender=PlayedGame)
+def refresh_leaderboard_entry(sender, instance, **kwargs):
+    leaderboard.refresh_students([instance.student_id])
+    rollups.refresh([instance])
+    # Position badges only move when the student is, or just was, in the top K. The rank comes
+    # from the table written just above; a Redis mirror only catches up once this commits
+    rank = leaderboard.DatabaseLeaderboard().rank(instance.student_id)
+    if (rank is not None and rank <= len(RANK_BADGES)) or Badge.objects.filter(
+        student_id=instance.student_id, scope="", position__isnull=False
+    ).exists():
+        transaction.on_commit(reconcile_rank_badges)
+
+
+@receiver(post_save, sender=PlayedGame)
+def record_game_played(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Every save of a PlayedGame is a finished play, except a rescore after a changed answer;
+    # bulk backfills skip signals and are not plays
+    if not raw and not (update_fields is not None and set(update_fields) <= {"score"}):
+        activity.record(instance.student_id, ActivityKind.GAME_PLAYED, instance.game_id, instance.played_at)
+
+
+@receiver(post_save, sender=Certificate)
+def record_certificate_issued(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        activity.record(instance.student_id, ActivityKind.CERTIFICATE_ISSUED, instance.id, instance.issued_at)
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=PointsLedger)
+@receiver(post_save, sender=PlayedGame)
+@receiver(post_delete, sender=PlayedGame)
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def refresh_student_stats(sender, instance, **kwargs):
+    student_stats.schedule_refresh([instance.student_id])
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=PointsLedger)
+def bump_profile_versions(sender, instance, **kwargs):
+    # Points and medals show on the leaderboard as well as the dashboard
+    versions.bump_students([instance.student_id])
+
+
+@receiver(post_save, sender=User)
+def bump_user_versions(sender, instance, update_fields=None, **kwargs):
+    # Names and avatars show on the dashboard and on every leaderboard; a login only writes last_login
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    versions.bump_students([instance.id])
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def bump_achievement_versions(sender, instance, **kwargs):
+    versions.bump_achievements([instance.student_id])
+
+
+@receiver(post_save, sender=KnowledgeTrail)
+@receiver(pre_delete, sender=KnowledgeTrail)
+def invalidate_trail_recommendations(sender, instance, **kwargs):
+    # The trail may just have gone private, so the public cohort is dropped either way
+    recommendations.invalidate(instance.target_students.values_list("id", flat=True), public=True)
+    versions.bump_trails(everyone=True)
+
+
+@receiver(m2m_changed, sender=KnowledgeTrail.target_students.through)
+def invalidate_target_recommendations(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("pre_clear", "post_add", "post_remove"):
+        return
+    if reverse:
+        student_ids = [instance.pk]
+    elif action == "pre_clear":
+        student_ids = list(instance.target_students.values_list("id", flat=True))
+    else:
+        student_ids = pk_set or ()
+    recommendations.invalidate(student_ids)
+    versions.bump_trails(student_ids)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=KnowledgeTrail)
+@receiver(pre_save, sender=Certificate)
+def remember_counter_memberships(sender, instance, raw=False, update_fields=None, **kwargs):
+    # None means the save cannot move any counter, e.g. a login only writing last_login
+    instance._counted = None
+    if raw:
+        return
+    if instance._state.adding:
+        instance._counted = set()
+        return
+    fields = counters.tracked_fields(sender)
+    if not fields or (update_fields is not None and not fields & set(update_fields)):
+        return
+    previous = sender.objects.only(*fields).filter(pk=instance.pk).first()
+    instance._counted = counters.memberships(previous) if previous else set()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=KnowledgeTrail)
+@receiver(post_save, sender=Certificate)
+def update_entity_counters(sender, instance, **kwargs):
+    previous = getattr(instance, "_counted", None)
+    if previous is None:
+        return
+    current = counters.memberships(instance)
+    counters.apply({name: int(name in current) - int(name in previous) for name in previous | current})
+    instance._counted = None
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=KnowledgeTrail)
+@receiver(post_delete, sender=Certificate)
+def decrement_entity_counters(sender, instance, **kwargs):
+    counters.apply({name: -1 for name in counters.memberships(instance)})
@@ -0,0 +1,134 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils.timezone import now
+
+from users.models import StudentProfile
+
+from .models import Certificate, PlayedGame, StudentStatsRollup, StudentStatsSnapshot
+
+User = get_user_model()
+
+STAT_FIELDS = ["points", "medals", "played_games", "certificates"]
+REBUILD_BATCH_SIZE = 1000
+
+_pending = threading.local()
+
+
+def _grouped_counts(queryset, student_ids):
+    return dict(
+        queryset.filter(student_id__in=student_ids).values("student_id").annotate(total=Count("id"))
+        .order_by().values_list("student_id", "total")
+    )
+
+
+def refresh(student_ids):
+    """
+    Recomputes the rollup rows of ``student_ids`` from StudentProfile,
+    PlayedGame and Certificate with one grouped query each and upserts them;
+    the baseline columns are left alone.
+    """
+    student_ids = set(User.objects.filter(pk__in=set(student_ids)).values_list("id", flat=True))
+    if not student_ids:
+        return
+    profiles = {
+        student_id: (points, medals)
+        for student_id, points, medals in StudentProfile.objects.filter(student_id__in=student_ids).values_list(
+            "student_id", "points", "medals"
+        )
+    }
+    played_games = _grouped_counts(PlayedGame.objects.all(), student_ids)
+    certificates = _grouped_counts(Certificate.objects.all(), student_ids)
+
+    stamp = now()
+    StudentStatsRollup.objects.bulk_create(
+        [
+            StudentStatsRollup(
+                student_id=student_id,
+                points=profiles.get(student_id, (0, 0))[0],
+                medals=profiles.get(student_id, (0, 0))[1],
+                played_games=played_games.get(student_id, 0),
+                certificates=certificates.get(student_id, 0),
+                updated_at=stamp,
+            )
+            for student_id in student_ids
+        ],
+        update_conflicts=True,
+        unique_fields=["student"],
+        update_fields=[*STAT_FIELDS, "updated_at"],
+    )
+
+
+def schedule_refresh(student_ids):
+    """
+    Queues ``student_ids`` for one refresh after the transaction commits, so
+    a play that writes a ledger row, a profile and a PlayedGame recomputes
+    its student once instead of once per save.
+    """
+    # Points land on the profile after their ledger row is written, so recompute from committed rows
+    _pending_ids().update(student_ids)
+    transaction.on_commit(_refresh_pending)
+
+
+def _pending_ids():
+    # Connections are per thread, so one pending set per thread is one per transaction
+    if not hasattr(_pending, "ids"):
+        _pending.ids = set()
+    return _pending.ids
+
+
+def _refresh_pending():
+    # The first callback to run refreshes everything queued; the rest find nothing left.
+    # Ids left behind by a rolled back transaction only cause a harmless extra refresh
+    student_ids = _pending_ids()
+    if student_ids:
+        _pending.ids = set()
+        refresh(student_ids)
+
+
+def get(student_id):
+    """Returns the student's rollup with one primary-key read, seeding it first if it was never written."""
+    rollup = StudentStatsRollup.objects.filter(pk=student_id).first()
+    if rollup is None:
+        refresh([student_id])
+        rollup = StudentStatsRollup.objects.get(pk=student_id)
+    return rollup
+
+
+def rebuild(batch_size=REBUILD_BATCH_SIZE):
+    """Recomputes every student's rollup, a batch of students at a time; returns how many were refreshed."""
+    refreshed = 0
+    batch = []
+    for student_id in StudentProfile.objects.values_list("student_id", flat=True).iterator(chunk_size=batch_size):
+        batch.append(student_id)
+        if len(batch) >= batch_size:
+            refresh(batch)
+            refreshed += len(batch)
+            batch = []
+    refresh(batch)
+    return refreshed + len(batch)
+
+
+def take_snapshots(batch_size=REBUILD_BATCH_SIZE):
+    """
+    Appends a StudentStatsSnapshot for every rollup and moves the rollups'
+    baselines to those values, so the deltas restart from this snapshot.
+    """
+    stamp = now()
+    with transaction.atomic():
+        rollups = StudentStatsRollup.objects.values_list("student_id", *STAT_FIELDS).iterator(chunk_size=batch_size)
+        StudentStatsSnapshot.objects.bulk_create(
+            (
+                StudentStatsSnapshot(
+                    student_id=student_id, taken_at=stamp, points=points, medals=medals,
+                    played_games=played_games, certificates=certificates,
+                )
+                for student_id, points, medals, played_games, certificates in rollups
+            ),
+            batch_size=batch_size,
+        )
+        return StudentStatsRollup.objects.update(
+            **{f"baseline_{field}": F(field) for field in STAT_FIELDS}, baseline_at=stamp
+        )
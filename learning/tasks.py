@@ -0,0 +1,61 @@
+import dramatiq
+
+from avag_learning.broker import setup_broker
+
+from . import counters, item_analysis, recommendations, student_stats
+from .badges import reconcile_rank_badges
+from .choices import LeaderboardWindow
+from .models import StudentAnswer
+from .recompute import recompute_game_results
+
+# Actors bind to the global broker when they are declared
+setup_broker()
+
+
+@dramatiq.actor(queue_name="grading", max_retries=5, min_backoff=1000)
+def grade_student_answer(answer_id):
+    """Grades a pending answer and applies its points, medals and game completion."""
+    StudentAnswer.grade_pending(answer_id)
+
+
+@dramatiq.actor(queue_name="maintenance", max_retries=0, time_limit=60 * 60 * 1000)
+def recompute_game_results_job():
+    """Periodic drift repair; schedule it (or the recompute_game_results command) from cron."""
+    recompute_game_results()
+
+
+@dramatiq.actor(queue_name="maintenance", max_retries=3)
+def reconcile_rank_badges_job(scope="", scope_id=None, window=LeaderboardWindow.ALL_TIME):
+    """Re-checks a board's position badges; idempotent, so safe to schedule for every board."""
+    reconcile_rank_badges(scope, scope_id, window)
+
+
+@dramatiq.actor(queue_name="maintenance", max_retries=3)
+def refresh_recommendations_job():
+    """Rebuilds every cached knowledge trail candidate list; schedule it periodically."""
+    recommendations.refresh_all()
+
+
+@dramatiq.actor(queue_name="maintenance", max_retries=3)
+def reconcile_counters_job():
+    """Repairs statistics counter drift left by bulk writes."""
+    counters.reconcile()
+
+
+@dramatiq.actor(queue_name="maintenance", max_retries=3)
+def snapshot_statistics_job():
+    """Stores a statistics snapshot; schedule it daily (or hourly) so windowed differences have a baseline."""
+    counters.take_snapshot()
+
+
+@dramatiq.actor(queue_name="maintenance", max_retries=3, time_limit=60 * 60 * 1000)
+def snapshot_student_stats_job():
+    """Rebuilds every student's stats rollup and snapshots it; schedule it daily so student deltas have a baseline."""
+    student_stats.rebuild()
+    student_stats.take_snapshots()
+
+
+@dramatiq.actor(queue_name="maintenance", max_retries=0, time_limit=60 * 60 * 1000)
+def analyze_questions_job():
+    """Recomputes item analysis for every answered question; schedule it nightly."""
+    item_analysis.run()
@@ -1,11 +1,23 @@
+from datetime import timedelta
+from importlib.util import find_spec
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.utils.timezone import now
 from users.models import StudentProfile
 from learning.models import (
     PlayedGame, Question, Option, StudentAnswer,
-    Game, Statistics, Certificate
+    Game, Statistics, Certificate, StudentGameProgress, PointsLedger,
+    StudentAnswerAttempt, Badge, Achievement, QuestionStats, StatisticsSnapshot, StudentStatsSnapshot,
+    ActivityEvent, award_top_students_badges
     )
+from learning import item_analysis, student_stats
+from learning.choices import ActivityKind
+from learning.leaderboard import get_leaderboard
 from rest_framework.test import APIClient
 from rest_framework import status
 from users.choices import UserType
@@ -86,6 +98,66 @@ class TeacherStatsTest(TestCase):
         self.assertIn("Certificates", response.data)
         
         
+class EntityCounterTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.teacher = User.objects.create_user(
+            email="counter-teacher@example.com", password="password123", role=UserType.TEACHER
+        )
+        self.client.force_authenticate(user=self.teacher)
+
+    def admin_stats(self, **params):
+        response = self.client.get("/learning/statistics/admin-stats/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counters_follow_writes_and_reads_do_not_write(self):
+        call_command("snapshot_statistics", stdout=StringIO())
+        StatisticsSnapshot.objects.update(taken_at=now() - timedelta(days=8))
+        self.assertEqual(self.admin_stats()["teachers"], {"count": 1, "difference": 0})
+
+        student = User.objects.create_user(email="counted@example.com", password="password123", role=UserType.STUDENT)
+        User.objects.create_user(email="counted-2@example.com", password="password123", role=UserType.STUDENT)
+        student.role = UserType.TEACHER
+        student.save()
+        with self.assertNumQueries(2):
+            stats = self.admin_stats()
+        self.assertEqual(stats["students"], {"count": 1, "difference": 1})
+        self.assertEqual(stats["teachers"], {"count": 2, "difference": 1})
+
+        student.delete()
+        self.assertEqual(self.admin_stats()["teachers"], {"count": 1, "difference": 0})
+
+    def test_reconcile_repairs_drift(self):
+        self.admin_stats()
+        # Bulk writes bypass the signals
+        User.objects.bulk_create([
+            User(email=f"bulk-{index}@example.com", role=UserType.STUDENT) for index in range(3)
+        ])
+        self.assertEqual(self.admin_stats()["students"]["count"], 0)
+
+        out = StringIO()
+        call_command("reconcile_counters", stdout=out)
+        self.assertIn("students: off by +3", out.getvalue())
+        self.assertEqual(self.admin_stats()["students"]["count"], 3)
+
+    def test_differences_use_the_snapshot_opening_the_window(self):
+        StatisticsSnapshot.objects.create(taken_at=now() - timedelta(days=10), counts={"students": 0})
+        StatisticsSnapshot.objects.create(taken_at=now() - timedelta(days=2), counts={"students": 2})
+        for index in range(3):
+            User.objects.create_user(email=f"window-{index}@example.com", password="password123", role=UserType.STUDENT)
+
+        self.assertEqual(self.admin_stats(window="7d")["students"], {"count": 3, "difference": 3})
+        self.assertEqual(self.admin_stats(window="24h")["students"], {"count": 3, "difference": 1})
+        # History shorter than the window falls back to the oldest snapshot
+        self.assertEqual(self.admin_stats(window="90d")["students"], {"count": 3, "difference": 3})
+
+        response = self.client.get("/learning/statistics/history/", {"window": "30d"})
+        self.assertEqual([snapshot["counts"]["students"] for snapshot in response.data], [0, 2])
+        response = self.client.get("/learning/statistics/admin-stats/", {"window": "week"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class StudentStatsTest(TestCase):    
     def setUp(self):
         # Create a student user
@@ -146,11 +218,34 @@ class StudentStatsTest(TestCase):
         self.student_profile.save()
         self.student_profile.refresh_from_db()
         
-        # Check the differences (assuming no changes since the last check)
+        # No snapshot has been taken yet, so everything counts as new
         self.assertEqual(response.data["points"]["difference"], 150)
         self.assertEqual(response.data["medals"]["difference"], 3)
-        self.assertEqual(response.data["played_games"]["new_played_games"], 0)
-        self.assertEqual(response.data["certificates"]["new_certificates"], 0)
+        self.assertEqual(response.data["played_games"]["new_played_games"], 1)
+        self.assertEqual(response.data["certificates"]["new_certificates"], 1)
+
+    def test_deltas_since_snapshot_from_one_read(self):
+        call_command("snapshot_student_stats", stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            PointsLedger.record(self.student, points=20, medals=1)
+            PlayedGame.objects.create(student=self.student, game=Game.objects.create(title="Second Game"), score=60)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/learning/statistics/student-stats/")
+        self.assertEqual(response.data["points"], {"count": 170, "difference": 20})
+        self.assertEqual(response.data["medals"], {"count": 4, "difference": 1})
+        self.assertEqual(response.data["played_games"], {"count": 2, "new_played_games": 1})
+        self.assertEqual(response.data["certificates"], {"count": 1, "new_certificates": 0})
+        self.assertEqual(StudentStatsSnapshot.objects.filter(student=self.student).count(), 1)
+
+    def test_refresh_runs_once_per_transaction(self):
+        with patch("learning.student_stats.refresh") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                PointsLedger.record(self.student, points=20, medals=1)
+                PlayedGame.objects.create(student=self.student, game=self.game, score=60)
+                Certificate.objects.create(student=self.student, file="second.pdf")
+        refresh.assert_called_once()
+        self.assertIn(self.student.id, refresh.call_args.args[0])
         
 
 class LeaderboardAPITest(TestCase):
@@ -198,4 +293,351 @@ class LeaderboardAPITest(TestCase):
         self.assertEqual(response.data[1]["student_name"], "Jane Smith")
         self.assertEqual(response.data[1]["total_score"], 200)
         self.assertEqual(response.data[2]["student_name"], "Alice Johnson")
-        self.assertEqual(response.data[2]["total_score"], 180)
\ No newline at end of file
+        self.assertEqual(response.data[2]["total_score"], 180)
+
+class AnswerKeyCacheTestCase(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(email="student@example.com", password="password", first_name="John")
+        self.question = Question.objects.create(question_text="Pick the even number", points=5)
+        self.even = Option.objects.create(question=self.question, option_text="2", is_correct=True)
+        self.odd = Option.objects.create(question=self.question, option_text="3", is_correct=False)
+
+    def test_grading_uses_cached_answer_key(self):
+        answer = StudentAnswer(student=self.student, question=self.question, selected_option=self.even)
+        self.assertTrue(answer.grade())
+
+        # A warm key is served without touching the database
+        with self.assertNumQueries(0):
+            self.assertTrue(answer.grade())
+
+    def test_option_change_invalidates_answer_key(self):
+        answer = StudentAnswer(student=self.student, question=self.question, selected_option=self.odd)
+        self.assertFalse(answer.grade())
+
+        self.odd.is_correct = True
+        self.odd.save()
+        question = Question.objects.get(pk=self.question.pk)
+        answer = StudentAnswer(student=self.student, question=question, selected_option=self.odd)
+        self.assertTrue(answer.grade())
+
+
+class StudentGameProgressTestCase(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(email="student@example.com", password="password", first_name="John")
+        self.game = Game.objects.create(title="Counting Game")
+        self.questions = []
+        for number in range(3):
+            question = Question.objects.create(question_text=f"Question {number}", points=1)
+            Option.objects.create(question=question, option_text="right", is_correct=True)
+            Option.objects.create(question=question, option_text="wrong", is_correct=False)
+            self.questions.append(question)
+        self.game.questions.add(*self.questions)
+
+    def answer(self, question, correct=True):
+        option = question.options.get(is_correct=correct)
+        StudentAnswer.objects.create(student=self.student, question=question, selected_option=option)
+
+    def test_counters_follow_answers(self):
+        self.answer(self.questions[0])
+        self.answer(self.questions[1], correct=False)
+
+        progress = StudentGameProgress.objects.get(student=self.student, game=self.game)
+        self.assertEqual(progress.answered_questions, 2)
+        self.assertEqual(progress.correct_answers, 1)
+        self.assertEqual(progress.total_questions, 3)
+        self.assertFalse(PlayedGame.objects.filter(student=self.student, game=self.game).exists())
+
+        self.answer(self.questions[2])
+        played_game = PlayedGame.objects.get(student=self.student, game=self.game)
+        self.assertEqual(played_game.score, 66)
+        self.assertTrue(played_game.completed)
+
+    def test_total_follows_game_questions(self):
+        self.answer(self.questions[0])
+        extra = Question.objects.create(question_text="Extra", points=1)
+        self.game.questions.add(extra)
+
+        progress = StudentGameProgress.objects.get(student=self.student, game=self.game)
+        self.assertEqual(progress.total_questions, 4)
+
+
+class PointsLedgerTestCase(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com", password="password", first_name="John", role=UserType.STUDENT
+        )
+        self.question = Question.objects.create(question_text="Pick the even number", points=5)
+        self.even = Option.objects.create(question=self.question, option_text="2", is_correct=True)
+
+    def test_correct_answer_appends_ledger_entry(self):
+        answer = StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=self.even)
+
+        entry = PointsLedger.objects.get(student=self.student)
+        self.assertEqual(entry.points_delta, 5)
+        self.assertEqual(entry.answer, answer)
+        self.assertEqual(StudentProfile.objects.get(student=self.student).points, 5)
+
+    def test_reconcile_fixes_drift(self):
+        PointsLedger.record(self.student, points=7, medals=1)
+        StudentProfile.objects.filter(student=self.student).update(points=100, medals=0)
+
+        call_command("reconcile_points", stdout=StringIO())
+
+        profile = StudentProfile.objects.get(student=self.student)
+        self.assertEqual(profile.points, 7)
+        self.assertEqual(profile.medals, 1)
+
+    def test_compaction_keeps_totals(self):
+        PointsLedger.record(self.student, points=3)
+        PointsLedger.record(self.student, points=4, medals=1)
+
+        call_command("reconcile_points", compact_older_than=-1, stdout=StringIO())
+
+        entry = PointsLedger.objects.get(student=self.student)
+        self.assertEqual((entry.points_delta, entry.medals_delta), (7, 1))
+        self.assertEqual(StudentProfile.objects.get(student=self.student).points, 7)
+
+
+class RegradeTestCase(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com", password="password", first_name="John", role=UserType.STUDENT
+        )
+        self.game = Game.objects.create(title="Capitals")
+        self.question = Question.objects.create(question_text="Capital of Australia?", points=10)
+        self.sydney = Option.objects.create(question=self.question, option_text="Sydney", is_correct=True)
+        self.canberra = Option.objects.create(question=self.question, option_text="Canberra", is_correct=False)
+        self.game.questions.add(self.question)
+        StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=self.canberra)
+
+    def test_regrade_flips_answers_and_moves_points(self):
+        self.sydney.is_correct = False
+        self.sydney.save()
+        self.canberra.is_correct = True
+        self.canberra.save()
+
+        student_stats.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("regrade_answers", question=[self.question.id], stdout=StringIO())
+
+        self.assertTrue(StudentAnswer.objects.get(student=self.student).is_correct)
+        self.assertEqual(StudentProfile.objects.get(student=self.student).points, 10)
+        self.assertEqual(student_stats.get(self.student.id).points, 10)
+        self.assertEqual(PlayedGame.objects.get(student=self.student, game=self.game).score, 100)
+        self.assertEqual(StudentGameProgress.objects.get(student=self.student, game=self.game).correct_answers, 1)
+
+        # Running it again finds nothing left to change
+        call_command("regrade_answers", question=[self.question.id], stdout=StringIO())
+        self.assertEqual(StudentProfile.objects.get(student=self.student).points, 10)
+
+
+class AnswerUpsertTestCase(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com", password="password", first_name="John", role=UserType.STUDENT
+        )
+        self.game = Game.objects.create(title="Retry Game")
+        self.question = Question.objects.create(question_text="Capital of France?", points=10)
+        self.other_question = Question.objects.create(question_text="Capital of Spain?", points=10)
+        self.paris = Option.objects.create(question=self.question, option_text="Paris", is_correct=True)
+        self.london = Option.objects.create(question=self.question, option_text="London", is_correct=False)
+        self.game.questions.add(self.question, self.other_question)
+
+    def test_reanswer_updates_canonical_row(self):
+        StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=self.london)
+        StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=self.paris)
+
+        answer = StudentAnswer.objects.get(student=self.student, question=self.question)
+        self.assertTrue(answer.is_correct)
+        self.assertEqual(answer.attempts, 2)
+        self.assertEqual(StudentAnswerAttempt.objects.filter(student=self.student).count(), 1)
+
+        progress = StudentGameProgress.objects.get(student=self.student, game=self.game)
+        self.assertEqual(progress.answered_questions, 1)
+        self.assertEqual(progress.correct_answers, 1)
+        self.assertEqual(StudentProfile.objects.get(student=self.student).points, 10)
+
+        # Answering correctly again does not award the points twice
+        StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=self.paris)
+        self.assertEqual(StudentProfile.objects.get(student=self.student).points, 10)
+
+    def test_changed_answer_on_finished_game_moves_leaderboard(self):
+        StudentAnswer.objects.create(student=self.student, question=self.other_question, typed_answer="Madrid")
+        StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=self.london)
+        self.assertEqual(get_leaderboard().score(self.student.id), 0)
+
+        StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=self.paris)
+
+        self.assertEqual(PlayedGame.objects.get(student=self.student, game=self.game).score, 50)
+        self.assertEqual(get_leaderboard().score(self.student.id), 50)
+        # A rescore is not another play
+        self.assertEqual(ActivityEvent.objects.filter(kind=ActivityKind.GAME_PLAYED).count(), 1)
+
+    def test_prune_keeps_latest_attempts(self):
+        for option in [self.london, self.paris, self.london, self.paris]:
+            StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=option)
+        self.assertEqual(StudentAnswerAttempt.objects.count(), 3)
+
+        call_command("prune_answer_attempts", keep=1, stdout=StringIO())
+
+        self.assertEqual(StudentAnswerAttempt.objects.count(), 1)
+
+    def test_prune_deletes_across_batches(self):
+        for option in [self.london, self.paris, self.london, self.paris]:
+            StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=option)
+        latest = StudentAnswerAttempt.objects.order_by("-answered_at", "-id").first()
+
+        with patch("learning.management.commands.prune_answer_attempts.DELETE_BATCH_SIZE", 1):
+            call_command("prune_answer_attempts", keep=1, stdout=StringIO())
+
+        self.assertEqual(list(StudentAnswerAttempt.objects.values_list("id", flat=True)), [latest.id])
+
+
+class RecomputeGameResultsTestCase(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com", password="password", first_name="John", role=UserType.STUDENT
+        )
+        self.game = Game.objects.create(title="Capitals")
+        self.question = Question.objects.create(question_text="Capital of France?", points=10)
+        self.paris = Option.objects.create(question=self.question, option_text="Paris", is_correct=True)
+        self.game.questions.add(self.question)
+        StudentAnswer.objects.create(student=self.student, question=self.question, selected_option=self.paris)
+
+    def test_recompute_repairs_drifted_results(self):
+        PlayedGame.objects.filter(student=self.student, game=self.game).update(score=10)
+        StudentGameProgress.objects.filter(student=self.student, game=self.game).update(correct_answers=0)
+        StudentProfile.objects.filter(student=self.student).update(medals=5)
+
+        call_command("recompute_game_results", dry_run=True, stdout=StringIO())
+        self.assertEqual(PlayedGame.objects.get(student=self.student, game=self.game).score, 10)
+
+        call_command("recompute_game_results", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(PlayedGame.objects.get(student=self.student, game=self.game).score, 100)
+        self.assertEqual(StudentGameProgress.objects.get(student=self.student, game=self.game).correct_answers, 1)
+        # Medals are only reset on request
+        self.assertEqual(StudentProfile.objects.get(student=self.student).medals, 5)
+
+        student_stats.rebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("recompute_game_results", reset_medals=True, stdout=StringIO())
+        self.assertEqual(StudentProfile.objects.get(student=self.student).medals, 1)
+        self.assertEqual(student_stats.get(self.student.id).medals, 1)
+
+
+class MaterializedLeaderboardTestCase(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(title="Quiz")
+        self.students = [
+            User.objects.create_user(email=f"s{i}@example.com", password="password", first_name=f"S{i}")
+            for i in range(3)
+        ]
+
+    def test_entries_follow_played_games(self):
+        first, second, third = self.students
+        PlayedGame.objects.create(student=first, game=self.game, score=50, completed=True)
+        played_game = PlayedGame.objects.create(student=second, game=self.game, score=90, completed=True)
+        PlayedGame.objects.create(student=second, game=self.game, score=10, completed=True)
+        PlayedGame.objects.create(student=third, game=self.game, score=50, completed=True)
+
+        board = get_leaderboard()
+        self.assertEqual(board.top(1), [(second.id, 100)])
+        self.assertEqual(board.rank(second.id), 1)
+        # Tied students share a rank
+        self.assertEqual(board.rank(first.id), 2)
+        self.assertEqual(board.rank(third.id), 2)
+
+        played_game.delete()
+        self.assertEqual(board.rank(second.id), 3)
+        self.assertEqual(board.count(), 3)
+
+        PlayedGame.objects.filter(student=second).delete()
+        self.assertIsNone(board.rank(second.id))
+
+
+class RankBadgeReconcilerTestCase(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(title="Podium")
+        self.students = [
+            User.objects.create_user(email=f"podium{i}@example.com", password="password", first_name=f"P{i}")
+            for i in range(4)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.played = [
+                PlayedGame.objects.create(student=student, game=self.game, score=score, completed=True)
+                for student, score in zip(self.students, [90, 80, 70, 10])
+            ]
+
+    def holders(self):
+        return dict(Badge.objects.filter(scope="", position__isnull=False).values_list("name", "student_id"))
+
+    def test_only_changed_positions_are_touched(self):
+        first, second, third, fourth = self.students
+        self.assertEqual(self.holders(), {"Gold": first.id, "Silver": second.id, "Bronze": third.id})
+        gold = Badge.objects.get(name="Gold")
+
+        # The fourth student overtakes the third: only Bronze changes hands
+        self.played[3].score = 75
+        with self.captureOnCommitCallbacks(execute=True):
+            self.played[3].save()
+
+        self.assertEqual(self.holders(), {"Gold": first.id, "Silver": second.id, "Bronze": fourth.id})
+        self.assertEqual(Badge.objects.get(name="Gold").updated_at, gold.updated_at)
+        self.assertEqual(Achievement.objects.get(badge__name="Bronze").student_id, fourth.id)
+        self.assertFalse(Achievement.objects.filter(student=third).exists())
+
+        report = award_top_students_badges()
+        self.assertEqual(report, {"awarded": 0, "moved": 0, "revoked": 0, "unchanged": 3})
+
+
+@skipUnless(find_spec("numpy"), "item analysis needs NumPy")
+class ItemAnalysisTestCase(TestCase):
+    def setUp(self):
+        self.quiz = Question.objects.create(question_text="Capital of Italy?", question_type="quiz")
+        self.right = Option.objects.create(question=self.quiz, option_text="Rome", is_correct=True)
+        self.wrong = Option.objects.create(question=self.quiz, option_text="Milan")
+        self.unused = Option.objects.create(question=self.quiz, option_text="Oslo")
+        self.typed = Question.objects.create(
+            question_text="2 + 3 = ?", question_type="fill_in_the_blank", correct_answer="5"
+        )
+        answers = []
+        # Two strong students get both right, two weak ones pick the distractor and miss the typed question
+        for index, strong in enumerate([True, True, False, False]):
+            student = User.objects.create_user(email=f"item-{index}@example.com", password="password123")
+            answers.append(StudentAnswer(
+                student=student, question=self.quiz, selected_option=self.right if strong else self.wrong,
+                is_correct=strong, graded_at=now(),
+            ))
+            answers.append(StudentAnswer(
+                student=student, question=self.typed, typed_answer="5" if strong else "6",
+                is_correct=strong, graded_at=now(),
+            ))
+        # Bulk inserts skip grading, so the rows are exactly as written
+        StudentAnswer.objects.bulk_create(answers)
+
+    def test_difficulty_discrimination_and_distractors(self):
+        out = StringIO()
+        call_command("analyze_questions", chunk_size=3, stdout=out)
+        self.assertIn("Analyzed 2 question(s).", out.getvalue())
+
+        stats = QuestionStats.objects.get(question=self.quiz)
+        self.assertEqual((stats.answers, stats.correct, stats.p_value), (4, 2, 0.5))
+        self.assertAlmostEqual(stats.discrimination, 1.0)
+        options = {option["option"]: option for option in stats.options}
+        self.assertEqual((options[self.wrong.id]["picks"], options[self.wrong.id]["share"]), (2, 0.5))
+        self.assertAlmostEqual(options[self.wrong.id]["discrimination"], -1.0)
+        self.assertEqual(options[self.unused.id]["picks"], 0)
+        self.assertIsNone(options[self.unused.id]["discrimination"])
+        self.assertEqual(QuestionStats.objects.get(question=self.typed).options, [])
+
+        teacher = User.objects.create_user(email="item-teacher@example.com", password="password123", role=UserType.TEACHER)
+        client = APIClient()
+        client.force_authenticate(user=teacher)
+        response = client.get(f"/learning/questions/{self.quiz.id}/stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["p_value"], 0.5)
+
+        StudentAnswer.objects.filter(question=self.typed).delete()
+        item_analysis.run()
+        self.assertFalse(QuestionStats.objects.filter(question=self.typed).exists())
@@ -1,3 +1,14 @@
+from io import StringIO
+from unittest.mock import patch
+
+import dramatiq
+from dramatiq import Message
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -6,8 +17,13 @@ from rest_framework import status
 
 from users.models import StudentProfile
 from users.choices import UserType
-from learning.models import Game, KnowledgeTrail, Subject, StudentAnswer
-from learning.choices import QuestionType
+from learning.models import (
+    Achievement, Badge, Game, Institution, KnowledgeTrail, Subject, StudentAnswer, Question, Option, PlayedGame,
+    StudentGameProgress, UserAttendance
+)
+from learning.choices import ActivityKind, QuestionType
+from learning import exports, versions
+from learning.tasks import grade_student_answer
 
 User = get_user_model()
 
@@ -238,3 +254,633 @@ class KnowledgeTrailTests(APITestCase):
         
         response = self.client.post(self.url, data, format='multipart')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SubmitGameTestCase(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com", password="pass1234",
+            first_name="Student", role=UserType.STUDENT
+        )
+        self.game = Game.objects.create(title="Batch Game")
+        self.quiz_q = Question.objects.create(question_text="Capital of France?", points=10)
+        self.paris = Option.objects.create(question=self.quiz_q, option_text="Paris", is_correct=True)
+        self.berlin = Option.objects.create(question=self.quiz_q, option_text="Berlin", is_correct=False)
+        self.fill_q = Question.objects.create(
+            question_text="2 + 2 = ?", question_type=QuestionType.FILL_IN_THE_BLANK,
+            points=5, correct_answer="4"
+        )
+        self.game.questions.add(self.quiz_q, self.fill_q)
+        self.url = reverse("student-answer-submit-game")
+        self.client.force_authenticate(user=self.student)
+
+    def test_submit_game_grades_all_answers_at_once(self):
+        payload = {
+            "game": self.game.id,
+            "answers": [
+                {"question": self.quiz_q.id, "selected_option": self.paris.id},
+                {"question": self.fill_q.id, "typed_answer": " 4 "},
+            ]
+        }
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["correct"], 2)
+        self.assertEqual(response.data["points"], 15)
+        self.assertTrue(response.data["medal_awarded"])
+
+        profile = StudentProfile.objects.get(student=self.student)
+        self.assertEqual(profile.points, 15)
+        self.assertEqual(profile.medals, 1)
+        self.assertEqual(StudentAnswer.objects.filter(student=self.student, is_correct=True).count(), 2)
+        played_game = PlayedGame.objects.get(student=self.student, game=self.game)
+        self.assertEqual(played_game.score, 100)
+        self.assertTrue(played_game.completed)
+
+    def test_submit_game_keeps_shared_games_in_step(self):
+        other_game = Game.objects.create(title="Shared Game")
+        other_game.questions.add(self.quiz_q)
+        payload = {"game": self.game.id, "answers": [{"question": self.quiz_q.id, "selected_option": self.paris.id}]}
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        progress = StudentGameProgress.objects.get(student=self.student, game=other_game)
+        self.assertEqual((progress.answered_questions, progress.correct_answers), (1, 1))
+        # Its only question is answered, so the shared game is finished with its medal
+        self.assertEqual(PlayedGame.objects.get(student=self.student, game=other_game).score, 100)
+        self.assertEqual(StudentProfile.objects.get(student=self.student).medals, 1)
+
+    def test_submit_game_rejects_foreign_question(self):
+        other_q = Question.objects.create(question_text="Not in the game", points=1)
+        payload = {
+            "game": self.game.id,
+            "answers": [{"question": other_q.id, "typed_answer": "x"}]
+        }
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StudentAnswer.objects.exists())
+
+
+@override_settings(ASYNC_GRADING=True)
+class AsyncGradingTestCase(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com", password="pass1234",
+            first_name="Student", role=UserType.STUDENT
+        )
+        self.question = Question.objects.create(question_text="Capital of France?", points=10)
+        self.paris = Option.objects.create(question=self.question, option_text="Paris", is_correct=True)
+        self.broker = dramatiq.get_broker()
+        self.broker.flush_all()
+        self.client.force_authenticate(user=self.student)
+
+    def test_answer_is_graded_by_actor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("student-answer-list"),
+                {"question": self.question.id, "selected_option": self.paris.id, "student": self.student.id},
+                format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        answer = StudentAnswer.objects.get(pk=response.data["id"])
+        self.assertIsNone(answer.graded_at)
+        self.assertEqual(StudentProfile.objects.get(student=self.student).points, 0)
+        self.assertEqual(self.broker.queues["grading"].qsize(), 1)
+
+        message = Message.decode(self.broker.queues["grading"].get())
+        grade_student_answer.fn(*message.args)
+        # A redelivered message must not award the points twice
+        grade_student_answer.fn(*message.args)
+
+        answer.refresh_from_db()
+        self.assertTrue(answer.is_correct)
+        self.assertIsNotNone(answer.graded_at)
+        self.assertEqual(StudentProfile.objects.get(student=self.student).points, 10)
+
+
+class GameSessionTestCase(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com", password="pass1234",
+            first_name="Student", role=UserType.STUDENT
+        )
+        self.game = Game.objects.create(title="Session Game")
+        self.quiz_q = Question.objects.create(question_text="Capital of France?", points=10)
+        self.paris = Option.objects.create(question=self.quiz_q, option_text="Paris", is_correct=True)
+        self.fill_q = Question.objects.create(
+            question_text="2 + 2 = ?", question_type=QuestionType.FILL_IN_THE_BLANK,
+            points=5, correct_answer="4"
+        )
+        self.game.questions.add(self.quiz_q, self.fill_q)
+        self.client.force_authenticate(user=self.student)
+
+    def test_session_buffers_answers_until_finish(self):
+        response = self.client.post(reverse("game-start", args=[self.game.id]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        session = response.data["session"]
+
+        answer_url = reverse("game-answer", args=[self.game.id])
+        with self.assertNumQueries(0):
+            self.client.post(answer_url, {"session": session, "question": self.quiz_q.id, "selected_option": self.paris.id}, format="json")
+        self.client.post(answer_url, {"session": session, "question": self.fill_q.id, "typed_answer": "5"}, format="json")
+        # The last answer for a question wins
+        self.client.post(answer_url, {"session": session, "question": self.fill_q.id, "typed_answer": "4"}, format="json")
+        self.assertFalse(StudentAnswer.objects.exists())
+
+        response = self.client.post(reverse("game-finish", args=[self.game.id]), {"session": session}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["points"], 15)
+        self.assertEqual(StudentAnswer.objects.filter(student=self.student).count(), 2)
+        played_game = PlayedGame.objects.get(student=self.student, game=self.game)
+        self.assertEqual(played_game.score, 100)
+        self.assertIsNotNone(played_game.duration)
+
+        response = self.client.post(reverse("game-finish", args=[self.game.id]), {"session": session}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_answer_rejects_unknown_session(self):
+        response = self.client.post(
+            reverse("game-answer", args=[self.game.id]),
+            {"session": "missing", "question": self.quiz_q.id, "selected_option": self.paris.id},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_answer_with_non_numeric_game_is_not_found(self):
+        response = self.client.post(
+            reverse("game-answer", args=["abc"]),
+            {"session": "missing", "question": self.quiz_q.id, "selected_option": self.paris.id},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_resubmitting_without_duration_keeps_it(self):
+        session = self.client.post(reverse("game-start", args=[self.game.id])).data["session"]
+        self.client.post(
+            reverse("game-answer", args=[self.game.id]),
+            {"session": session, "question": self.quiz_q.id, "selected_option": self.paris.id}, format="json"
+        )
+        self.client.post(reverse("game-finish", args=[self.game.id]), {"session": session}, format="json")
+        duration = PlayedGame.objects.get(student=self.student, game=self.game).duration
+
+        self.client.post(
+            reverse("student-answer-submit-game"),
+            {"game": self.game.id, "answers": [{"question": self.fill_q.id, "typed_answer": "4"}]}, format="json"
+        )
+        self.assertEqual(PlayedGame.objects.get(student=self.student, game=self.game).duration, duration)
+
+
+class StudentDashboardRankTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.game = Game.objects.create(title="Ranked Game")
+        self.students = []
+        for index, score in enumerate([40, 90, 90, 10]):
+            student = User.objects.create_user(
+                email=f"ranked{index}@example.com", password="pass1234",
+                first_name=f"Ranked{index}", role=UserType.STUDENT
+            )
+            StudentProfile.objects.get_or_create(student=student)
+            PlayedGame.objects.create(student=student, game=self.game, score=score, completed=True)
+            self.students.append(student)
+
+    def test_classification_uses_batched_ranks(self):
+        self.client.force_authenticate(user=self.students[3])
+        response = self.client.get(reverse("student-dashboard"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        classification = response.data["classification"]
+        self.assertEqual([entry["total_score"] for entry in classification], [90, 90, 40])
+        self.assertEqual([entry["leaderboard_rank"] for entry in classification], [1, 1, 3])
+
+    def test_batch_ranks(self):
+        from learning.leaderboard import get_leaderboard
+
+        ids = [student.id for student in self.students]
+        self.assertEqual(get_leaderboard().ranks(ids), dict(zip(ids, [3, 1, 1, 4])))
+
+
+class LeaderboardPageTestCase(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="pager@example.com", password="pass1234", first_name="Pager", role=UserType.STUDENT
+        )
+        self.game = Game.objects.create(title="Paged Game")
+        for index, score in enumerate([70, 90, 70, 50, 70]):
+            student = User.objects.create_user(
+                email=f"paged{index}@example.com", password="pass1234", first_name=f"Paged{index}"
+            )
+            PlayedGame.objects.create(student=student, game=self.game, score=score, completed=True)
+
+    def test_keyset_pages_with_competition_ranks(self):
+        self.client.force_authenticate(user=self.student)
+        url = reverse("leaderboard-page")
+
+        results, cursor = [], None
+        while True:
+            response = self.client.get(url, {"page_size": 2, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results += response.data["results"]
+            cursor = response.data["next"]
+            if not cursor:
+                break
+
+        self.assertEqual([row["score"] for row in results], [90, 70, 70, 70, 50])
+        self.assertEqual([row["rank"] for row in results], [1, 2, 2, 2, 5])
+        self.assertEqual(len({row["student_id"] for row in results}), 5)
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get(reverse("leaderboard-page"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_full_leaderboard_is_capped_and_links_to_next_page(self):
+        cache.clear()
+        self.client.force_authenticate(user=self.student)
+        with patch("learning.leaderboard.PAGE_SIZE", 2):
+            response = self.client.get(reverse("leaderboard-leaderboard"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["score"] for row in response.data], [90, 70])
+        first_ids = [row["student_id"] for row in response.data]
+        next_url = response["Link"].split(">")[0].lstrip("<")
+        response = self.client.get(next_url)
+        self.assertEqual([row["score"] for row in response.data["results"]], [70, 70, 50])
+        # The tie at the page boundary is split in the cursor's order: nobody skipped or repeated
+        self.assertEqual(len(set(first_ids + [row["student_id"] for row in response.data["results"]])), 5)
+
+
+class ActivityTimelineTestCase(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="timeline@example.com", password="pass1234", first_name="Timeline", role=UserType.STUDENT
+        )
+        self.other = User.objects.create_user(
+            email="elsewhere@example.com", password="pass1234", first_name="Elsewhere", role=UserType.STUDENT
+        )
+        self.subject = Subject.objects.create(name="Geography", description="Maps")
+        self.client.force_authenticate(user=self.student)
+
+    def test_writers_append_events_and_timeline_pages_newest_first(self):
+        games = [Game.objects.create(title=f"Timeline Game {index}") for index in range(3)]
+        for game in games:
+            PlayedGame.objects.create(student=self.student, game=game, score=50, completed=True)
+        PlayedGame.objects.create(student=self.other, game=games[0], score=50, completed=True)
+        trail = KnowledgeTrail.objects.create(
+            title="Rivers", subject=self.subject, assigned_by=self.other, description="", video_file="rivers.mp4"
+        )
+        response = self.client.post(reverse("knowledge-trail-record-view", args=[trail.id]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        url = reverse("student-activity-timeline")
+        events, cursor = [], None
+        while True:
+            response = self.client.get(url, {"page_size": 3, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            events += response.data["results"]
+            cursor = response.data["next"]
+            if not cursor:
+                break
+
+        self.assertEqual(
+            [(event["kind"], event["object_id"]) for event in events],
+            [(ActivityKind.TRAIL_VIEWED, trail.id)] + [(ActivityKind.GAME_PLAYED, game.id) for game in reversed(games)],
+        )
+
+        response = self.client.get(reverse("student-activity"))
+        self.assertEqual([row["id"] for row in response.data["knowledge_trails_watched_video"]], [trail.id])
+        self.assertEqual(response.data["knowledge_trails_pdf"], [])
+
+    def test_page_is_one_query(self):
+        game = Game.objects.create(title="Timeline Game")
+        for _ in range(5):
+            PlayedGame.objects.create(student=self.student, game=game, score=50, completed=True)
+        cursor = self.client.get(reverse("student-activity-timeline"), {"page_size": 2}).data["next"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("student-activity-timeline"), {"page_size": 2, "cursor": cursor})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(len(queries), 1)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("student-activity-timeline"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ScopedLeaderboardTestCase(APITestCase):
+    def setUp(self):
+        self.institution = Institution.objects.create(name="North School", address="North")
+        self.other_institution = Institution.objects.create(name="South School", address="South")
+        self.subject = Subject.objects.create(name="Maths", description="Numbers")
+        self.maths = Game.objects.create(title="Sums", subject=self.subject)
+        self.history = Game.objects.create(title="Dates")
+        self.alice = User.objects.create_user(
+            email="alice@example.com", password="pass1234", first_name="Alice", institution=self.institution
+        )
+        self.bob = User.objects.create_user(
+            email="bob@example.com", password="pass1234", first_name="Bob", institution=self.institution
+        )
+        self.carol = User.objects.create_user(
+            email="carol@example.com", password="pass1234", first_name="Carol", institution=self.other_institution
+        )
+        PlayedGame.objects.create(student=self.alice, game=self.maths, score=60, completed=True)
+        PlayedGame.objects.create(student=self.bob, game=self.history, score=80, completed=True)
+        PlayedGame.objects.create(student=self.carol, game=self.maths, score=90, completed=True)
+
+    def scoped(self, **params):
+        response = self.client.get(reverse("leaderboard-scoped"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row["student_id"], row["score"]) for row in response.data["results"]]
+
+    def test_boards_per_scope(self):
+        self.client.force_authenticate(user=self.alice)
+        self.assertEqual(self.scoped(scope="institution"), [(self.bob.id, 80), (self.alice.id, 60)])
+        self.assertEqual(
+            self.scoped(scope="subject", scope_id=self.subject.id, window="week"),
+            [(self.carol.id, 90), (self.alice.id, 60)],
+        )
+        self.assertEqual(self.scoped(scope="game", scope_id=self.history.id, window="month"), [(self.bob.id, 80)])
+
+    def test_rollups_follow_played_game_changes(self):
+        self.client.force_authenticate(user=self.alice)
+        PlayedGame.objects.create(student=self.alice, game=self.history, score=30, completed=True)
+        self.assertEqual(self.scoped(scope="institution"), [(self.alice.id, 90), (self.bob.id, 80)])
+
+        PlayedGame.objects.filter(student=self.bob).delete()
+        self.assertEqual(self.scoped(scope="game", scope_id=self.history.id), [(self.alice.id, 30)])
+
+        # A full rebuild lands on the same rows
+        call_command("rebuild_leaderboard", stdout=StringIO())
+        self.assertEqual(self.scoped(scope="institution"), [(self.alice.id, 90)])
+
+    def test_scope_id_required_outside_institution(self):
+        self.client.force_authenticate(user=self.alice)
+        response = self.client.get(reverse("leaderboard-scoped"), {"scope": "game"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AroundMeTestCase(APITestCase):
+    def setUp(self):
+        self.game = Game.objects.create(title="Neighbours")
+        self.students = []
+        for index, score in enumerate([100, 80, 80, 60, 40, 20]):
+            student = User.objects.create_user(
+                email=f"near{index}@example.com", password="pass1234", first_name=f"Near{index}"
+            )
+            PlayedGame.objects.create(student=student, game=self.game, score=score, completed=True)
+            self.students.append(student)
+
+    def test_neighbours_on_each_side(self):
+        self.client.force_authenticate(user=self.students[3])
+        response = self.client.get(reverse("leaderboard-around-me"), {"radius": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rank"], 4)
+        self.assertEqual([row["score"] for row in response.data["results"]], [80, 80, 60, 40, 20])
+        self.assertEqual([row["rank"] for row in response.data["results"]], [2, 2, 4, 5, 6])
+
+    def test_student_off_the_board(self):
+        outsider = User.objects.create_user(email="outsider@example.com", password="pass1234", first_name="Out")
+        self.client.force_authenticate(user=outsider)
+        response = self.client.get(reverse("leaderboard-around-me"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["rank"])
+        self.assertEqual(response.data["results"], [])
+
+
+class ConditionalLeaderboardTestCase(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="poller@example.com", password="pass1234", first_name="Poller", role=UserType.STUDENT
+        )
+        StudentProfile.objects.get_or_create(student=self.student)
+        self.game = Game.objects.create(title="Polled Game")
+        self.client.force_authenticate(user=self.student)
+
+    def test_unchanged_leaderboard_returns_304_without_queries(self):
+        url = reverse("leaderboard-leaderboard")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PlayedGame.objects.create(student=self.student, game=self.game, score=50, completed=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_dashboard_etag_follows_own_achievements(self):
+        url = reverse("student-dashboard")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        badge = Badge.objects.create(name="Explorer", student=self.student, description="", image="badges/x.png")
+        with self.captureOnCommitCallbacks(execute=True):
+            Achievement.objects.create(student=self.student, badge=badge)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+    def test_name_change_invalidates_dashboard_and_leaderboard(self):
+        urls = [reverse("student-dashboard"), reverse("leaderboard-leaderboard")]
+        etags = [self.client.get(url)["ETag"] for url in urls]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.first_name = "Renamed"
+            self.student.save()
+        for url, etag in zip(urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_around_me_etag_is_per_user(self):
+        other = User.objects.create_user(
+            email="other-poller@example.com", password="pass1234", first_name="Other", role=UserType.STUDENT
+        )
+        url = reverse("leaderboard-around-me")
+        etag = self.client.get(url)["ETag"]
+        self.client.force_authenticate(user=other)
+        self.assertNotEqual(self.client.get(url)["ETag"], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class DashboardQueryBudgetTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(
+            email="budget@example.com", password="pass1234", first_name="Budget", role=UserType.STUDENT
+        )
+        StudentProfile.objects.get_or_create(student=self.student)
+        self.subject = Subject.objects.create(name="Science", description="Science")
+        self.game = Game.objects.create(title="Budget Game")
+        self.client.force_authenticate(user=self.student)
+
+    def add_data(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add_data(count)
+
+    def _add_data(self, count):
+        for index in range(count):
+            other = User.objects.create_user(
+                email=f"budget-{count}-{index}@example.com", password="pass1234", first_name="Other"
+            )
+            StudentProfile.objects.get_or_create(student=other)
+            PlayedGame.objects.create(student=other, game=self.game, score=10 * index, completed=True)
+            UserAttendance.objects.create(student=other)
+            badge = Badge.objects.create(
+                name=f"Badge {count}-{index}", student=self.student, description="", image="badges/x.png"
+            )
+            Achievement.objects.create(student=self.student, badge=badge)
+            trail = KnowledgeTrail.objects.create(
+                title=f"Trail {count}-{index}", subject=self.subject, assigned_by=self.student, description=""
+            )
+            trail.target_students.add(other)
+
+    def dashboard_queries(self):
+        # Warm the recommendation candidates, which are rebuilt only on a cache miss
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("student-dashboard"))
+        # Then expire every fragment, so the measured hit rebuilds all of them
+        with self.captureOnCommitCallbacks(execute=True):
+            versions.bump(*versions.dashboard_scopes(self.student.id))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("student-dashboard"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_data(self):
+        self.add_data(1)
+        baseline = self.dashboard_queries()
+        self.add_data(6)
+        self.assertEqual(self.dashboard_queries(), baseline)
+        self.assertEqual(baseline, 7)
+
+    def test_cached_fragments_cost_no_queries(self):
+        self.add_data(3)
+        self.dashboard_queries()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("student-dashboard"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 0)
+
+    def test_new_achievement_rebuilds_only_its_fragment(self):
+        self.add_data(3)
+        self.dashboard_queries()
+        before = self.client.get(reverse("student-dashboard")).data
+        with self.captureOnCommitCallbacks(execute=True):
+            badge = Badge.objects.create(name="Fresh", student=self.student, description="", image="badges/x.png")
+            Achievement.objects.create(student=self.student, badge=badge)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("student-dashboard"))
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data["achievements"][0]["badge"]["name"], "Fresh")
+        self.assertEqual(response.data["knowledge_trail"], before["knowledge_trail"])
+        self.assertEqual(response.data["classification"], before["classification"])
+
+
+class DashboardRecommendationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            email="recommender@example.com", password="pass1234", first_name="Teacher", role=UserType.TEACHER
+        )
+        self.student = User.objects.create_user(
+            email="reader@example.com", password="pass1234", first_name="Reader", role=UserType.STUDENT
+        )
+        self.other = User.objects.create_user(
+            email="other-reader@example.com", password="pass1234", first_name="Other", role=UserType.STUDENT
+        )
+        StudentProfile.objects.get_or_create(student=self.student)
+        self.subject = Subject.objects.create(name="History", description="History")
+        self.client.force_authenticate(user=self.student)
+
+    def trail(self, title, **kwargs):
+        targets = kwargs.pop("targets", [])
+        with self.captureOnCommitCallbacks(execute=True):
+            trail = KnowledgeTrail.objects.create(
+                title=title, subject=self.subject, assigned_by=self.teacher, description="", **kwargs
+            )
+            trail.target_students.set(targets)
+        return trail
+
+    def picked_titles(self):
+        response = self.client.get(reverse("student-dashboard"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {trail["title"] for trail in response.data["knowledge_trail"]}
+
+    def test_picks_respect_visibility_and_recommended(self):
+        self.trail("Plain")
+        self.trail("Hidden", is_public=False, targets=[self.other])
+        self.assertEqual(self.picked_titles(), {"Plain"})
+
+        # Recommended trails fill the slots before plain ones, including private ones aimed at the student
+        for title in ["Featured 1", "Featured 2"]:
+            self.trail(title, recommended=True)
+        self.trail("Featured for you", recommended=True, is_public=False, targets=[self.student])
+        self.assertEqual(self.picked_titles(), {"Featured 1", "Featured 2", "Featured for you"})
+
+
+class CsvExportTestCase(APITestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email="exporter@example.com", password="pass1234", first_name="Exporter", role=UserType.TEACHER
+        )
+        self.games = [Game.objects.create(title=f"Export Game {index}") for index in range(2)]
+        self.students = []
+        for index in range(3):
+            student = User.objects.create_user(
+                email=f"exported{index}@example.com", password="pass1234", first_name=f"Exported{index}",
+                role=UserType.STUDENT,
+            )
+            StudentProfile.objects.get_or_create(student=student)
+            self.students.append(student)
+        PlayedGame.objects.create(student=self.students[0], game=self.games[0], score=70, completed=True)
+        PlayedGame.objects.create(student=self.students[0], game=self.games[1], score=40, completed=True)
+        PlayedGame.objects.create(student=self.students[2], game=self.games[1], score=90, completed=True)
+
+    def download(self, name):
+        response = self.client.get(reverse(f"export-{name}"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        return [line.split(",") for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_gradebook_pivots_students_by_game(self):
+        self.client.force_authenticate(user=self.teacher)
+        rows = self.download("gradebook")
+        self.assertEqual(rows[0], [
+            "student_id", "student_email", f"Export Game 0 (#{self.games[0].id})", f"Export Game 1 (#{self.games[1].id})"
+        ])
+        self.assertEqual([row[2:] for row in rows[1:]], [["70", "40"], ["", ""], ["", "90"]])
+
+    def test_gradebook_skips_plays_of_users_no_longer_listed(self):
+        # As if the first student's role changed between the two reads
+        students = User.objects.exclude(pk=self.students[0].pk)
+        with patch.object(User.objects, "filter", side_effect=students.filter):
+            rows = list(exports.gradebook_rows())
+        self.assertEqual([row[2:] for row in rows[1:]], [["", ""], ["", 90]])
+
+    def test_exports_stream_every_row(self):
+        self.client.force_authenticate(user=self.teacher)
+        self.assertEqual(len(self.download("played-games")), 4)
+        self.assertEqual(len(self.download("profiles")), 4)
+        self.assertEqual(self.download("answers"), [[
+            "answer_id", "student_id", "student_email", "question_id", "selected_option_id", "typed_answer",
+            "is_correct", "attempts", "graded_at",
+        ]])
+
+        out = StringIO()
+        call_command("export_csv", "profiles", chunk_size=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+    def test_exports_quote_formula_cells(self):
+        User.objects.filter(pk=self.students[1].pk).update(first_name="=1+2", last_name="-Smith")
+        self.client.force_authenticate(user=self.teacher)
+        row = next(row for row in self.download("profiles") if row[0] == str(self.students[1].id))
+        self.assertEqual(row[2:4], ["'=1+2", "'-Smith"])
+
+    def test_students_cannot_export(self):
+        self.client.force_authenticate(user=self.students[0])
+        response = self.client.get(reverse("export-answers"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,8 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    CertificateViewSet, StatisticsViewSet, StudentDashboardAPIView,
-    KnowledgeTrailViewSet, LeaderboardViewSet, StudentActivityAPIView,
+    CertificateViewSet, ExportViewSet, StatisticsViewSet, StudentDashboardAPIView,
+    KnowledgeTrailViewSet, LeaderboardViewSet, StudentActivityAPIView, StudentActivityTimelineAPIView,
     QuestionViewSet, OptionalViewSet, GameViewSet,
     StudentAnswerViewSet, SubjectViestSet, PlayedGameViewSet, ModuleViewSet
 )
@@ -20,9 +20,11 @@ router.register(r"statistics", StatisticsViewSet, basename="statistic")
 router.register(r"certificates", CertificateViewSet, basename="certificate")
 router.register(r"playedgame", PlayedGameViewSet, basename="playedgame")
 router.register(r"modules", ModuleViewSet, basename="module")
+router.register(r"exports", ExportViewSet, basename="export")
 
 urlpatterns = [
     path("dashboard/", StudentDashboardAPIView.as_view(), name="student-dashboard"),
     path("student-activity/", StudentActivityAPIView.as_view(), name="student-activity"),
+    path("student-activity/timeline/", StudentActivityTimelineAPIView.as_view(), name="student-activity-timeline"),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,88 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+CACHE_PREFIX = "version"
+LEADERBOARD = "leaderboard"
+TRAILS = "trails"
+
+
+def profile_scope(student_id):
+    return f"profile:{student_id}"
+
+
+def achievements_scope(student_id):
+    return f"achievements:{student_id}"
+
+
+def trails_scope(student_id):
+    return f"trails:{student_id}"
+
+
+def dashboard_scopes(student_id):
+    """Everything a student's dashboard depends on, one scope per dashboard fragment."""
+    return [profile_scope(student_id), achievements_scope(student_id), trails_scope(student_id), TRAILS, LEADERBOARD]
+
+
+def _cache_key(scope):
+    return f"{CACHE_PREFIX}:{scope}"
+
+
+def _seed():
+    # A counter lost to eviction restarts above anything handed out before, so old ETags never match again
+    return int(time.time() * 1000)
+
+
+def get_versions(*scopes):
+    """Returns the current counter for each scope, creating missing ones; one cache round trip when warm."""
+    keys = {scope: _cache_key(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    versions = []
+    for scope, key in keys.items():
+        if key not in found:
+            cache.add(key, _seed(), None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def etag(*scopes):
+    return "-".join(str(version) for version in get_versions(*scopes))
+
+
+def bump(*scopes):
+    """Moves each scope's counter forward once the current transaction commits."""
+    transaction.on_commit(lambda: _bump_now(scopes))
+
+
+def _bump_now(scopes):
+    for scope in scopes:
+        key = _cache_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _seed(), None)
+
+
+def bump_students(student_ids):
+    """
+    Bumps the profile scopes of ``student_ids`` and the leaderboard they appear
+    on; called when their points, medals, name or avatar change.
+    """
+    bump(*[profile_scope(student_id) for student_id in set(student_ids)], LEADERBOARD)
+
+
+def bump_achievements(student_ids):
+    scopes = [achievements_scope(student_id) for student_id in set(student_ids)]
+    if scopes:
+        bump(*scopes)
+
+
+def bump_trails(student_ids=(), everyone=False):
+    """Bumps the trail picks of ``student_ids``, or of every student for a public change."""
+    scopes = [trails_scope(student_id) for student_id in set(student_ids)]
+    if everyone:
+        scopes.append(TRAILS)
+    if scopes:
+        bump(*scopes)
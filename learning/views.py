@@ -17,27 +17,37 @@ import os
 
 from django.core.files.base import ContentFile
 from django.conf import settings
-from django.db.models import Sum
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Max, Q
-from django.http import FileResponse
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
 from users.choices import UserType
 
+from .choices import ActivityKind, LeaderboardScope
 from .models import (
-    Game, KnowledgeTrail, Achievement, Option, Statistics, StudentAnswer,
-    Subject, Question, PlayedGame, Certificate, Module
+    Game, KnowledgeTrail, Option, StudentAnswer,
+    Subject, Question, PlayedGame, Certificate, Module, LeaderboardEntry, ActivityEvent, QuestionStats
     )
 from .serializers import (
-    DashboardSerializer, GameSerializer, KnowledgeTrailSerializer,
-    AchievementSerializer, OptionSerializer,
+    GameSerializer, KnowledgeTrailSerializer, OptionSerializer,
     PlayedGameSerializer, QuestionSerializer, StudentAnswerSerializer,
     SubjectSerializer, ModuleSerializer,
-    StudentLeaderboardSerializer
+    StudentLeaderboardSerializer, GameSubmissionSerializer, GameSessionAnswerSerializer,
+    LeaderboardPageQuerySerializer, ScopedLeaderboardQuerySerializer, AroundMeQuerySerializer,
+    ActivityEventSerializer, ActivityTimelineQuerySerializer, StatisticsQuerySerializer, StatisticsSnapshotSerializer,
+    QuestionStatsSerializer
 )
-from users.models import StudentProfile
+from .exceptions import LeaderboardScopeRequired
+from .game_sessions import finish_session, get_session, record_answer, start_session
+from .grading import submit_game_answers
+from . import activity, counters, dashboard, exports, leaderboard, rollups, student_stats, versions
+from .tasks import grade_student_answer
 from users.serializers import UserSerializer, StudentProfileSerializer
 
 
@@ -52,6 +62,26 @@ class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
 
+    @action(detail=False, methods=["GET"], url_path="stats")
+    def stats(self, request):
+        # Item analysis is precomputed by the analyze_questions job; this only reads it
+        if request.user.role not in (UserType.TEACHER, UserType.ADMIN):
+            return Response({"error": "Only teachers can view question statistics."}, status=status.HTTP_403_FORBIDDEN)
+        stats = QuestionStats.objects.select_related("question").order_by("question_id")
+        game_id = request.query_params.get("game")
+        if game_id:
+            if not game_id.isdigit():
+                return Response({"error": "game must be a game id."}, status=status.HTTP_400_BAD_REQUEST)
+            stats = stats.filter(question__games=game_id)
+        return Response(QuestionStatsSerializer(stats, many=True).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["GET"], url_path="stats")
+    def question_stats(self, request, pk=None):
+        if request.user.role not in (UserType.TEACHER, UserType.ADMIN):
+            return Response({"error": "Only teachers can view question statistics."}, status=status.HTTP_403_FORBIDDEN)
+        stats = get_object_or_404(QuestionStats.objects.select_related("question"), question_id=pk)
+        return Response(QuestionStatsSerializer(stats).data, status=status.HTTP_200_OK)
+
 
 class OptionalViewSet(viewsets.ModelViewSet):
     queryset = Option.objects.all()
@@ -61,6 +91,35 @@ class OptionalViewSet(viewsets.ModelViewSet):
 class GameViewSet(viewsets.ModelViewSet):  
     serializer_class = GameSerializer
     queryset = Game.objects.all().order_by("id")
+
+    @action(detail=True, methods=["POST"], url_path="start")
+    def start(self, request, pk=None):
+        session = start_session(request.user, self.get_object())
+        return Response({
+            "session": session["id"],
+            "game": session["game_id"],
+            "started_at": session["started_at"],
+            "questions": list(session["questions"]),
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["POST"], url_path="answer")
+    def answer(self, request, pk=None):
+        # Buffered in the cache only; nothing is written to the database until finish
+        serializer = GameSessionAnswerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if not pk.isdigit():
+            raise Http404
+        session = get_session(data["session"], request.user, int(pk))
+        record_answer(session, data["question"], data.get("selected_option"), data.get("typed_answer"))
+        return Response({"message": "Answer recorded."}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=["POST"], url_path="finish")
+    def finish(self, request, pk=None):
+        game = self.get_object()
+        session = get_session(request.data.get("session"), request.user, game.id)
+        result = finish_session(session, request.user, game)
+        return Response(result, status=status.HTTP_201_CREATED)
     
 class PlayedGameViewSet(viewsets.ModelViewSet):
     serializer_class = PlayedGameSerializer
@@ -72,50 +131,40 @@ class PlayedGameViewSet(viewsets.ModelViewSet):
             return PlayedGame.objects.filter(student=user)
         return super().get_queryset()
 
+def _dashboard_etag(request, *args, **kwargs):
+    return versions.etag(*versions.dashboard_scopes(request.user.id))
+
+
+def _leaderboard_etag(request, *args, **kwargs):
+    # Any listed student's score, medals, name or avatar bumps the leaderboard scope
+    return versions.etag(versions.LEADERBOARD)
+
+
+def _around_me_etag(request, *args, **kwargs):
+    # The window is centred on the caller, so the tag is per user
+    return f"{request.user.id}-" + versions.etag(versions.LEADERBOARD, versions.profile_scope(request.user.id))
+
+
 class StudentDashboardAPIView(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=_dashboard_etag))
     def get(self, request):
         user = request.user
-        student_profile = get_object_or_404(StudentProfile, student=user)
 
         # Fetch user details
         user_data = UserSerializer(user).data
 
-        # Fetch student profile details (now includes rank, total score, etc.)
-        profile_data = DashboardSerializer(student_profile).data
-
-        # Fetch recent achievements
-        achievements = Achievement.objects.filter(student=user).order_by('-awarded_at')[:4]
-        achievements_data = AchievementSerializer(achievements, many=True).data
-
-        # Fetch recent knowledge trail items
-        knowledge_trail = KnowledgeTrail.objects.filter(assigned_by=user).order_by('?')[:3]
-        knowledge_trail_data = KnowledgeTrailSerializer(knowledge_trail, many=True).data
-
-        # Calculate top 3 for classification (we'll fetch the top 3 profiles and serialize them)
-        top_profiles = StudentProfile.objects.annotate(
-            total_score=Sum('student__playedgame__score')
-        ).order_by('-total_score')[:3]
-
-        leaderboard_data = []
-        rank = 1
-        for profile in top_profiles:
-            leaderboard_entry = DashboardSerializer(profile).data
-            leaderboard_entry['rank'] = rank
-            leaderboard_data.append(leaderboard_entry)
-            rank += 1
+        # Profile stats, achievements, trail picks and classification are cached fragments
+        fragments = dashboard.get_fragments(user)
 
         return Response({
             "user": user_data,
-            "points": profile_data.get('points', 0),
-            "medal": profile_data.get('medals', 0),
-            "level": profile_data.get('level', 1),
-            "activities": profile_data.get('activities_completed', 0),
-            "achievements": achievements_data,
-            "knowledge_trail": knowledge_trail_data,
-            "classification": leaderboard_data,
+            **fragments["profile"],
+            "achievements": fragments["achievements"],
+            "knowledge_trail": fragments["knowledge_trail"],
+            "classification": fragments["classification"],
         })
 
 
@@ -145,6 +194,13 @@ class KnowledgeTrailViewSet(viewsets.ModelViewSet):
         knowledge_trails = KnowledgeTrail.objects.filter(is_watched=True).order_by("id")[:4]
         serializer = KnowledgeTrailSerializer(knowledge_trails, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["POST"], url_path="view")
+    def record_view(self, request, pk=None):
+        # get_object() applies the visibility rules, so only visible trails can be logged
+        trail = self.get_object()
+        event = activity.record(request.user.id, ActivityKind.TRAIL_VIEWED, trail.id)
+        return Response(ActivityEventSerializer(event).data, status=status.HTTP_201_CREATED)
         
 
 class StudentActivityAPIView(APIView):
@@ -153,8 +209,15 @@ class StudentActivityAPIView(APIView):
         user = request.user
 
         played_games = PlayedGame.objects.filter(student=user).order_by("id")[:4]
-        knowledge_trails_watched_video = KnowledgeTrail.objects.filter(is_watched=True).order_by("id")[:4]
-        knowledge_trails_pdf = KnowledgeTrail.objects.filter(pdf_file__isnull=False).order_by("id")[:4]
+        # Only trails this student has viewed, most recently viewed first
+        last_viewed = ActivityEvent.objects.filter(
+            student=user, kind=ActivityKind.TRAIL_VIEWED, object_id=OuterRef("pk")
+        ).order_by("-occurred_at").values("occurred_at")[:1]
+        viewed_trails = KnowledgeTrail.objects.annotate(last_viewed=Subquery(last_viewed)).filter(
+            last_viewed__isnull=False
+        ).order_by("-last_viewed")
+        knowledge_trails_watched_video = viewed_trails.exclude(video_file="").exclude(video_file__isnull=True)[:4]
+        knowledge_trails_pdf = viewed_trails.exclude(pdf_file="").exclude(pdf_file__isnull=True)[:4]
         
         return Response({
             "played_games": PlayedGameSerializer(played_games, many=True).data,
@@ -163,35 +226,98 @@ class StudentActivityAPIView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class StudentActivityTimelineAPIView(APIView):
+
+    def get(self, request):
+        params = ActivityTimelineQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        cursor = params.validated_data.get("cursor")
+        before = activity.decode_cursor(cursor) if cursor else None
+        events, next_position = activity.timeline(
+            request.user.id, before=before, limit=params.validated_data["page_size"]
+        )
+
+        return Response({
+            "results": ActivityEventSerializer(events, many=True).data,
+            "next": activity.encode_cursor(next_position) if next_position else None,
+        }, status=status.HTTP_200_OK)
+
+
+def _leaderboard_row(entry, score):
+    student = entry.student
+    profile = getattr(student, "profile", None)
+    return {
+        "image": student.avatar.name if student.avatar else None,
+        "student_id": student.id,
+        "student_name": f"{student.first_name} {student.last_name}",
+        "score": score,
+        "medals": profile.medals if profile else 0,
+        "last_activity": entry.last_activity,
+    }
+
 
 class LeaderboardViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["GET"], url_path="leaderboard")
+    @method_decorator(condition(etag_func=_leaderboard_etag))
     def leaderboard(self, request):
-        # Aggregate total scores and last activity for each student
-        leaderboard_data = (
-            PlayedGame.objects.values("student__id", "student__first_name", "student__last_name", "student__avatar")
-            .annotate(
-                total_score=Sum("score"),
-                last_activity=Max("played_at"),
-                medals=Sum("student__profile__medals"),
-            )
-            .order_by("-total_score")  # Order by total score in descending order
-        )
+        # Only the top page is served here; the rest of the ranking is behind the page endpoint. It is
+        # read from the table in PAGE_ORDERING so ties at the page boundary match the cursor that follows
+        entries, next_position = leaderboard.page(limit=leaderboard.PAGE_SIZE)
+        leaderboard_data = [_leaderboard_row(entry, entry.total_score) for entry in entries]
+
+        headers = {}
+        if next_position:
+            cursor = leaderboard.encode_cursor(next_position)
+            headers["Link"] = f'<{request.build_absolute_uri(reverse("leaderboard-page"))}?cursor={cursor}>; rel="next"'
+        return Response(leaderboard_data, status=200, headers=headers)
+
+    @action(detail=False, methods=["GET"], url_path="page")
+    @method_decorator(condition(etag_func=_leaderboard_etag))
+    def page(self, request):
+        params = LeaderboardPageQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return self._page_response(params.validated_data)
+
+    @action(detail=False, methods=["GET"], url_path="scoped")
+    @method_decorator(condition(etag_func=_leaderboard_etag))
+    def scoped(self, request):
+        params = ScopedLeaderboardQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return self._page_response(params.validated_data, board=self._scoped_board(request, params.validated_data))
+
+    @action(detail=False, methods=["GET"], url_path="around-me")
+    @method_decorator(condition(etag_func=_around_me_etag))
+    def around_me(self, request):
+        params = AroundMeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        board = self._scoped_board(request, params.validated_data)
+        entries = leaderboard.around(request.user.id, params.validated_data["radius"], board=board)
+        rank = next((entry.rank for entry in entries if entry.student_id == request.user.id), None)
+        return Response({
+            "rank": rank,
+            "results": [{"rank": entry.rank, **_leaderboard_row(entry, entry.total_score)} for entry in entries],
+        }, status=status.HTTP_200_OK)
 
-        # Format the response
-        leaderboard = [
-            {   
-                "image": entry["student__avatar"] if entry["student__avatar"] else None,
-                "student_id": entry["student__id"],
-                "student_name": f"{entry['student__first_name']} {entry['student__last_name']}",
-                "score": entry["total_score"],
-                "medals": entry["medals"],
-                "last_activity": entry["last_activity"]
-            }
-            for entry in leaderboard_data
-        ]
+    def _scoped_board(self, request, params):
+        scope = params.get("scope")
+        if not scope:
+            return None
+        scope_id = params.get("scope_id")
+        if scope_id is None and scope == LeaderboardScope.INSTITUTION:
+            scope_id = request.user.institution_id
+        if scope_id is None:
+            raise LeaderboardScopeRequired()
+        return rollups.board(scope, scope_id, params["window"])
+
+    def _page_response(self, params, board=None):
+        cursor = params.get("cursor")
+        after = leaderboard.decode_cursor(cursor) if cursor else None
+        entries, next_position = leaderboard.page(after=after, limit=params["page_size"], board=board)
 
-        return Response(leaderboard, status=200)
+        return Response({
+            "results": [{"rank": entry.rank, **_leaderboard_row(entry, entry.total_score)} for entry in entries],
+            "next": leaderboard.encode_cursor(next_position) if next_position else None,
+        }, status=status.HTTP_200_OK)
     
 
 class StudentAnswerViewSet(viewsets.ModelViewSet):
@@ -199,148 +325,104 @@ class StudentAnswerViewSet(viewsets.ModelViewSet):
     serializer_class = StudentAnswerSerializer
 
     def perform_create(self, serializer):
-        # Automatically associate the logged-in student with the answer
-        serializer.save(student=self.request.user)
+        if not settings.ASYNC_GRADING:
+            # Automatically associate the logged-in student with the answer
+            serializer.save(student=self.request.user)
+            activity.record(self.request.user.id, ActivityKind.ANSWER_SUBMITTED, serializer.instance.question_id)
+            return
+
+        # Store the raw answer and let the grading actor do the rest
+        answer = StudentAnswer(**{**serializer.validated_data, "student": self.request.user})
+        answer.save(grade=False)
+        serializer.instance = answer
+        activity.record(self.request.user.id, ActivityKind.ANSWER_SUBMITTED, answer.question_id)
+        transaction.on_commit(lambda: grade_student_answer.send(answer.id))
+
+    @action(detail=False, methods=["POST"], url_path="submit-game")
+    def submit_game(self, request):
+        # Grade every answer of a game in a single request and transaction
+        serializer = GameSubmissionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = submit_game_answers(
+            request.user,
+            serializer.validated_data["game"],
+            serializer.answer_rows(),
+        )
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+def _counter_stat(counter, baseline):
+    # "difference" is the change since the snapshot that opens the requested window
+    return {"count": counter.value, "difference": counter.value - baseline.get(counter.name, counter.value)}
 
 
 class StatisticsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["GET"], url_path="admin-stats")
     def get_admin_stats(self, request):
-        # Get the current counts
-        current_student_count = User.objects.filter(role=UserType.STUDENT).count()
-        current_teacher_count = User.objects.filter(role=UserType.TEACHER).count()
-        current_video_count = KnowledgeTrail.objects.filter(video_file__isnull=False).count()
-        current_pdf_count = KnowledgeTrail.objects.filter(pdf_file__isnull=False).count()
-
-        # Get or create the statistics record
-        stats, created = Statistics.objects.get_or_create(id=1)
-
-        # Calculate the differences
-        student_diff = current_student_count - stats.students
-        teacher_diff = current_teacher_count - stats.teachers
-        video_diff = current_video_count - stats.knowledge_trail_videos
-        pdf_diff = current_pdf_count - stats.knowledge_trail_pdfs
-
-        # Update the statistics record
-        stats.students = current_student_count
-        stats.teachers = current_teacher_count
-        stats.knowledge_trail_videos = current_video_count
-        stats.knowledge_trail_pdfs = current_pdf_count
-        stats.save()
-
-        # Return the counts and differences in the response
+        params = StatisticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        # Counters are maintained on write and differences come from a stored snapshot, so nothing is counted here
+        stats = counters.get_counts([
+            counters.STUDENTS, counters.TEACHERS, counters.KNOWLEDGE_TRAIL_VIDEOS, counters.KNOWLEDGE_TRAIL_PDFS
+        ])
+        baseline = counters.baseline(params.validated_data["window"])
+
         return Response({
-            "students": {
-                "count": current_student_count,
-                "difference": student_diff
-            },
-            "teachers": {
-                "count": current_teacher_count,
-                "difference": teacher_diff
-            },
-            "knowledge_trail_videos": {
-                "count": current_video_count,
-                "difference": video_diff
-            },
-            "knowledge_trail_pdfs": {
-                "count": current_pdf_count,
-                "difference": pdf_diff
-            }
+            "students": _counter_stat(stats[counters.STUDENTS], baseline),
+            "teachers": _counter_stat(stats[counters.TEACHERS], baseline),
+            "knowledge_trail_videos": _counter_stat(stats[counters.KNOWLEDGE_TRAIL_VIDEOS], baseline),
+            "knowledge_trail_pdfs": _counter_stat(stats[counters.KNOWLEDGE_TRAIL_PDFS], baseline),
         }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=["GET"], url_path="teacher-stats")
     def get_teacher_stats(self, request):
-        
-        # Get the current counts
-        current_student_count = User.objects.filter(role=UserType.STUDENT).count()
-        current_teacher_count = User.objects.filter(role=UserType.TEACHER).count()
-        current_video_count = KnowledgeTrail.objects.filter(video_file__isnull=False).count()
-        current_certificate_count = Certificate.objects.filter(student__isnull=False).count()
-
-        # Get or create the statistics record
-        stats, created = Statistics.objects.get_or_create(id=1)
+        params = StatisticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        stats = counters.get_counts([
+            counters.STUDENTS, counters.TEACHERS, counters.KNOWLEDGE_TRAIL_VIDEOS, counters.CERTIFICATES
+        ])
+        baseline = counters.baseline(params.validated_data["window"])
+        certificates = _counter_stat(stats[counters.CERTIFICATES], baseline)
 
-        new_certificates = Certificate.objects.filter(created_at__gt=stats.last_updated).count()
-        
-        # Calculate the differences
-        student_diff = current_student_count - stats.students
-        teacher_diff = current_teacher_count - stats.teachers
-        video_diff = current_video_count - stats.knowledge_trail_videos
-
-        # Update the statistics record
-        stats.students = current_student_count
-        stats.teachers = current_teacher_count
-        stats.knowledge_trail_videos = current_video_count
-        stats.certificates_issued += new_certificates
-        stats.last_updated = datetime.now()
-        stats.save()
-
-        # Return the counts and differences in the response
         return Response({
-            "students": {
-                "count": current_student_count,
-                "difference": student_diff
-            },
-            "classes": {
-                "count": current_teacher_count,
-                "difference": teacher_diff
-            },
-            "lessons": {
-                "count": current_video_count,
-                "difference": video_diff
-            },
+            "students": _counter_stat(stats[counters.STUDENTS], baseline),
+            "classes": _counter_stat(stats[counters.TEACHERS], baseline),
+            "lessons": _counter_stat(stats[counters.KNOWLEDGE_TRAIL_VIDEOS], baseline),
             "Certificates": {
-                "count": current_certificate_count,
-                "new_certificates": new_certificates
+                "count": certificates["count"],
+                "new_certificates": certificates["difference"]
             }
         }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["GET"], url_path="history")
+    def history(self, request):
+        # Chart data: the stored snapshots inside the window, oldest first
+        params = StatisticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        snapshots = counters.history(params.validated_data["window"])
+        return Response(StatisticsSnapshotSerializer(snapshots, many=True).data, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=["GET"], url_path="student-stats")
     def get_student_stats(self, request):
-        student = request.user
-        # Get the student's profile
-        student_profile = StudentProfile.objects.get(student=student)
-
-        # Get the current counts
-        current_student_point_count = student_profile.points
-        current_student_medals_count = student_profile.medals
-        played_games_count = PlayedGame.objects.filter(student=student).count()
-        current_certificate_count = Certificate.objects.filter(student=student).count()
-
-        # Get or create the statistics record
-        stats, created = Statistics.objects.get_or_create(id=1)
+        # One primary-key read; differences are measured from the latest snapshot_student_stats run
+        stats = student_stats.get(request.user.id)
 
-        new_certificates = Certificate.objects.filter(student=student, created_at__gt=stats.last_updated).count()
-        new_played_games = PlayedGame.objects.filter(student=student, played_at__gt=stats.last_updated).count()
-        
-        # Calculate the differences
-        student_point_diff = current_student_point_count - stats.student_points
-        student_medals_diff = current_student_medals_count - stats.student_medals
-        
-        # Update the statistics record
-        stats.student_points = student_point_diff
-        stats.student_medals = student_medals_diff
-        stats.certificates_issued += new_certificates
-        stats.last_updated = datetime.now()
-        stats.save()
-
-        # Return the counts and differences in the response
         return Response({
             "points": {
-                "count": current_student_point_count,
-                "difference": student_point_diff
+                "count": stats.points,
+                "difference": stats.points - stats.baseline_points
             },
             "medals": {
-                "count": current_student_medals_count,
-                "difference": student_medals_diff
+                "count": stats.medals,
+                "difference": stats.medals - stats.baseline_medals
             },
             "played_games": {
-                    "count": played_games_count,
-                    "new_played_games": new_played_games
+                    "count": stats.played_games,
+                    "new_played_games": stats.played_games - stats.baseline_played_games
             },
             "certificates": {
-                "count": current_certificate_count,
-                "new_certificates": new_certificates
+                "count": stats.certificates,
+                "new_certificates": stats.certificates - stats.baseline_certificates
             }
         }, status=status.HTTP_200_OK)
    
@@ -486,4 +568,31 @@ class ModuleViewSet(viewsets.ModelViewSet):
         if user.role == UserType.TEACHER:
             return Module.objects.filter(assigned_by=user).order_by("order")
         else:
-            return Module.objects.all().order_by("order")
\ No newline at end of file
+            return Module.objects.all().order_by("order")
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """CSV downloads streamed straight from a database cursor, so memory stays flat whatever the row count."""
+
+    @action(detail=False, methods=["GET"], url_path="answers")
+    def answers(self, request):
+        return self._stream(request, "answers")
+
+    @action(detail=False, methods=["GET"], url_path="played-games")
+    def played_games(self, request):
+        return self._stream(request, "played-games")
+
+    @action(detail=False, methods=["GET"], url_path="profiles")
+    def profiles(self, request):
+        return self._stream(request, "profiles")
+
+    @action(detail=False, methods=["GET"], url_path="gradebook")
+    def gradebook(self, request):
+        return self._stream(request, "gradebook")
+
+    def _stream(self, request, name):
+        if request.user.role not in (UserType.TEACHER, UserType.ADMIN):
+            return Response({"error": "Only teachers can export data."}, status=status.HTTP_403_FORBIDDEN)
+        response = StreamingHttpResponse(exports.stream(name), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{name}.csv"'
+        return response